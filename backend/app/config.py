@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 from datetime import datetime
 
@@ -18,8 +19,10 @@ MODELS_DIR = BASE_DIR / "models"
 CSV_FILENAME = "swat_clean_stage4.csv"
 MODEL_FILENAME = "vae_lstm_swat_stage4.pt"
 
-CSV_PATH = DATA_DIR / CSV_FILENAME
-MODEL_PATH = MODELS_DIR / MODEL_FILENAME
+# Farklı bir capture / model ile çalıştırmak için env ile override edilebilir
+# (örn. tools/loadtest.py sentetik veri + rastgele ağırlıkla bunu kullanıyor)
+CSV_PATH = Path(os.environ.get("SWAT_CSV_PATH", DATA_DIR / CSV_FILENAME))
+MODEL_PATH = Path(os.environ.get("SWAT_MODEL_PATH", MODELS_DIR / MODEL_FILENAME))
 
 
 # ==============================
@@ -81,9 +84,58 @@ def infer_feature_cols_from_csv(
     return numeric_cols
 
 
-# Eğitimde kullandığın mantıkla numeric feature'ları otomatik çıkar:
-FEATURE_COLS: list[str] = infer_feature_cols_from_csv(CSV_PATH, LABEL_COL)
-N_FEATURES: int = len(FEATURE_COLS)
+# Feature kolonları artık dataset başına (datasets.py) bu fonksiyonla çıkarılıyor;
+# import anında CSV okunmuyor.
+
+# ==============================
+#  Dataset'ler (tek process, çoklu capture)
+# ==============================
+
+# Birden fazla capture'ı (normal, attack, hat bazlı ...) aynı process'te servis
+# etmek için JSON dosyası:
+#   {
+#     "normal": {"csv": "data/swat_normal.csv", "model": "models/vae_lstm_swat_stage4.pt"},
+#     "attack": {"csv": "data/swat_attack.csv", "model": "models/vae_lstm_swat_stage4.pt"}
+#   }
+# Göreli yollar backend/ klasörüne göredir. Aynı model dosyası bir kez yüklenip paylaşılır.
+# Dosya yoksa CSV_PATH / MODEL_PATH ile tek bir "default" dataset kullanılır.
+DATASETS_FILE = Path(os.environ.get("SWAT_DATASETS_FILE", BASE_DIR / "datasets.json"))
+
+# Prefix'siz (eski) endpoint'lerin kullandığı dataset; None => ilk dataset
+DEFAULT_DATASET: str | None = os.environ.get("SWAT_DEFAULT_DATASET")
+
+
+def load_dataset_specs() -> dict[str, dict[str, Path]]:
+    """
+    DATASETS_FILE'dan {isim: {"csv": Path, "model": Path}} okur.
+    """
+    if not DATASETS_FILE.exists():
+        return {"default": {"csv": CSV_PATH, "model": MODEL_PATH}}
+
+    import json
+
+    with DATASETS_FILE.open("r") as f:
+        raw = json.load(f)
+
+    if not raw:
+        raise ValueError(f"{DATASETS_FILE.name} içinde hiç dataset tanımlı değil.")
+
+    def resolve(p: str) -> Path:
+        path = Path(p)
+        return path if path.is_absolute() else BASE_DIR / path
+
+    return {
+        name: {
+            "csv": resolve(spec["csv"]),
+            "model": resolve(spec.get("model", MODEL_PATH)),
+        }
+        for name, spec in raw.items()
+    }
+
+
+# CSV'den üretilen memory-mapped (.npy) feature cache'lerinin klasörü.
+# CSV değişirse (boyut / mtime) cache otomatik yeniden üretilir.
+DATA_CACHE_DIR = Path(os.environ.get("SWAT_CACHE_DIR", DATA_DIR / "cache"))
 
 # ==============================
 #  Sekans / pencere parametreleri
@@ -144,6 +196,49 @@ WINDOW_NORM_EPS: float = 1e-6
 # Örnek: ANOMALY_THRESHOLD = 0.65
 ANOMALY_THRESHOLD: float = 0.005 #0.40211  # TODO: Notebook'tan seçtiğin değeri buraya yaz
 
+# ==============================
+#  Atak episode tespiti (events.py)
+# ==============================
+
+# Histerezis: episode ANOMALY_THRESHOLD üstünde açılır,
+# bu değerin altına inince kapanmaya aday olur.
+EPISODE_EXIT_THRESHOLD: float = ANOMALY_THRESHOLD * 0.8
+
+# Debounce: açmak / kapatmak için gereken ardışık frame sayısı
+EPISODE_ENTER_FRAMES: int = 3
+EPISODE_EXIT_FRAMES: int = 10
+
+# Ground-truth label'ı bu değer olan satırlar "Attack segment" olarak ayrıca izlenir
+ATTACK_LABEL: str = "attack"
+
+# Her episode için saklanan en çok katkı veren sensör sayısı (z'ye göre)
+EPISODE_TOP_K: int = 5
+
+# Hafızada tutulan maksimum kapanmış episode sayısı
+EPISODE_MAX_STORED: int = 10_000
+
+# ==============================
+#  What-if senaryoları (whatif.py)
+# ==============================
+
+# Tek istekte skorlanabilecek maksimum senaryo sayısı (hepsi tek batch'te)
+WHATIF_MAX_SCENARIOS: int = 64
+
+# start verilmeyen pertürbasyonlar pencerenin son bu kadar adımına uygulanır.
+# Tüm pencereye eşit offset per-window z-score'da (APPLY_WINDOW_NORM) tamamen
+# sadeleşir ve skoru değiştirmez; bu yüzden varsayılan aralık sondadır.
+WHATIF_DEFAULT_SPAN: int = WINDOW_SIZE // 4
+
+# ==============================
+#  Export (export.py)
+# ==============================
+
+# Chunk boyu ilk chunk'tan başlayıp her adımda ikiye katlanır (max'a kadar):
+# küçük ilk chunk => client ilk byte'ları hemen görür,
+# büyük sonraki chunk'lar => batch forward pass daha verimli.
+EXPORT_FIRST_CHUNK: int = 64
+EXPORT_MAX_CHUNK: int = 2048
+
 # ==============================
 #  Replay (canlı akış simülasyonu) ayarları
 # ==============================
@@ -165,3 +260,7 @@ DEFAULT_SPEED: float = 1.0
 # Replay'i datasetin sadece bir bölümünde yapmak istersen:
 START_ROW: int = 0
 END_ROW: int | None = None  # None => sona kadar
+
+# Bir dataset'in frame'leri tüm bağlı socket'lere yayınlanır; her socket'in
+# gönderim kuyruğu bu kadar mesajı aşarsa (client yetişemiyor) bağlantı kapatılır.
+STREAM_QUEUE_MAX: int = 256
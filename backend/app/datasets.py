@@ -0,0 +1,184 @@
+"""
+Dataset modülü
+
+Bu modülün görevi:
+- config.DATASETS_FILE'da tanımlı her capture'ı (normal, attack, hat bazlı ...)
+  aynı process içinde isimle erişilebilir bir Dataset olarak açmak
+- Her dataset'in kendi memory-mapped verisini, playback state'ini, model
+  penceresini ve episode geçmişini tutmak
+- Aynı ağırlık dosyasını kullanan dataset'lerin nn.Module'ü paylaşmasını
+  sağlamak (model.get_shared_model)
+- Dataset başına hafıza raporu üretmek (map'lenen byte, resident byte,
+  heap'te tutulan timestamp index'i, paylaşılan model)
+
+Resident byte'lar Linux'ta /proc/self/smaps'ten okunur; diğer platformlarda None döner.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import DEFAULT_SPEED, DEFAULT_DATASET, WINDOW_SIZE, load_dataset_specs
+from .events import EpisodeDetector, LabelSegmentTracker
+from .model import SwatVaeLstmModel, load_or_fit_scaler
+from .replay import MappedCapture, load_capture
+from .windows import WindowPipeline
+
+
+# ============================================================
+# PLAYBACK STATE
+# ============================================================
+
+class PlaybackState:
+    def __init__(self):
+        self.speed: float = DEFAULT_SPEED  # 1.0 = normal hız
+        self.playing: bool = True          # play/pause
+        self.direction: int = 1            # +1: ileri, -1: geri
+        self.current_index: int = 0        # hangi satırdayız
+        self.jump_requested: bool = False  # jump talebi varsa True
+        self.jump_to: int = 0              # jump hedef index
+
+
+# ============================================================
+# DATASET
+# ============================================================
+
+class Dataset:
+    def __init__(self, name: str, csv_path: Path, model_path: Path):
+        self.name = name
+        self.capture: MappedCapture = load_capture(csv_path)
+
+        self.feature_cols = self.capture.feature_cols
+        self.features = self.capture.features        # (N, feat) float32 memmap
+        self.timestamps = self.capture.timestamps
+        self.N = len(self.capture)
+
+        # Tüm capture bir kez ölçeklenir (cache klasöründe mmap), pencereler view'dır
+        self.pipeline = WindowPipeline(
+            self.features,
+            load_or_fit_scaler(self.features),
+            WINDOW_SIZE,
+            cache_dir=self.capture.cache_dir,
+        )
+        self.model = SwatVaeLstmModel(model_path, self.feature_cols, self.pipeline)
+
+        self.state = PlaybackState()
+        # Atak episode'ları backend'de artımlı olarak çıkarılır
+        self.episodes = EpisodeDetector()
+        # Ground-truth label'dan atak segmentleri (ayrı iz)
+        self.label_segments = LabelSegmentTracker()
+
+    def window_at(self, index: int, size: int) -> np.ndarray:
+        """index'te biten (size, feat) pencere (memmap üzerinde kopyasız view)."""
+        return self.features[index - size + 1:index + 1]
+
+    def memory_report(self, resident: Optional[Dict[str, int]] = None) -> Dict:
+        """
+        resident: dosya yolu -> resident byte (bkz. mapped_resident_bytes);
+        verilmezse okunur.
+        """
+        if resident is None:
+            resident = mapped_resident_bytes()
+
+        # Sadece bu dataset'in açtığı dosyalar (eski scaler'dan kalan scaled-*.npy sayılmaz)
+        files = list(self.capture.mapped_files)
+        if self.pipeline.scaled_path is not None:
+            files.append(self.pipeline.scaled_path)
+        mapped = sum(f.stat().st_size for f in files)
+        rss = None
+        if resident:
+            rss = sum(resident.get(str(f.resolve()), 0) for f in files)
+
+        return {
+            "mapped_bytes": mapped,
+            "resident_bytes": rss,
+            # Timestamp index'i process heap'inde (memmap değil)
+            "heap_bytes": int(self.timestamps.nbytes),
+            "model": str(self.model.model_path.resolve()),
+            # Paylaşılan ağırlıklar; aynı model dosyasını kullanan dataset'lerde tek kopya
+            "model_param_bytes": int(
+                sum(p.numel() * p.element_size() for p in self.model.model.parameters())
+            ),
+        }
+
+    def describe(self, resident: Optional[Dict[str, int]] = None) -> Dict:
+        return {
+            "name": self.name,
+            "csv": str(self.capture.csv_path),
+            "rows": self.N,
+            "n_features": len(self.feature_cols),
+            "memory": self.memory_report(resident),
+        }
+
+
+def mapped_resident_bytes() -> Optional[Dict[str, int]]:
+    """
+    /proc/self/smaps'ten dosya yolu -> resident byte (Rss) toplamı.
+    Linux dışında veya okunamazsa None.
+    """
+    try:
+        with open("/proc/self/smaps", "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    out: Dict[str, int] = {}
+    path = None
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        if not parts[0].endswith(":"):
+            # mapping başlığı: adres perms offset dev inode [yol]
+            path = parts[5] if len(parts) >= 6 else None
+        elif parts[0] == "Rss:" and path is not None:
+            out[path] = out.get(path, 0) + int(parts[1]) * 1024
+    return out
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+_datasets: Dict[str, Dataset] = {}
+
+
+def load_datasets() -> Dict[str, Dataset]:
+    """Tüm dataset'leri tek sefer açar (tekrar çağrılırsa aynısını döner)."""
+    if not _datasets:
+        for name, spec in load_dataset_specs().items():
+            print(f"[Datasets] Opening '{name}'")
+            _datasets[name] = Dataset(name, spec["csv"], spec["model"])
+    return _datasets
+
+
+def get_dataset(name: Optional[str] = None) -> Dataset:
+    """
+    İsimle dataset döner; name None ise DEFAULT_DATASET (o da yoksa ilk dataset).
+    Bilinmeyen isimde KeyError fırlatır.
+    """
+    datasets = load_datasets()
+    if name is None:
+        name = DEFAULT_DATASET or next(iter(datasets))
+    return datasets[name]
+
+
+def describe_datasets() -> List[Dict]:
+    """
+    Tüm dataset'lerin özeti; aynı model dosyasını kullananlar shared_with ile işaretlenir.
+    """
+    datasets = load_datasets()
+    resident = mapped_resident_bytes()
+    items = [ds.describe(resident) for ds in datasets.values()]
+
+    by_model: Dict[str, List[str]] = {}
+    for item in items:
+        by_model.setdefault(item["memory"]["model"], []).append(item["name"])
+    for item in items:
+        item["memory"]["model_shared_with"] = [
+            n for n in by_model[item["memory"]["model"]] if n != item["name"]
+        ]
+    return items
@@ -0,0 +1,310 @@
+"""
+Atak episode (olay) modülü
+
+Bu modülün görevi:
+- Replay sırasında her frame'in anomaly score'unu artımlı olarak işlemek
+- Histerezis + debounce ile episode başlangıç / bitişini belirlemek
+- Her episode için tepe skoru ve en çok katkı veren top-k sensörü tutmak
+- Kapanan episode'ları start_index'e göre sıralı, kompakt bir listede saklamak
+  ve satır aralığı sorgularına (bisect) cevap vermek
+
+Durum makinesi:
+- idle   : score > ANOMALY_THRESHOLD olan EPISODE_ENTER_FRAMES ardışık frame
+           gelince episode açılır (başlangıç = ilk eşik üstü frame).
+- active : score < EPISODE_EXIT_THRESHOLD olan EPISODE_EXIT_FRAMES ardışık frame
+           gelince episode kapanır (bitiş = eşik altına düşmeden önceki son frame).
+
+update() sadece durum değiştiğinde küçük delta mesajları döner;
+WebSocket bu deltaları frame'lerden ayrı olarak client'a iletir.
+
+Ground-truth atak segmentleri (label == ATTACK_LABEL) LabelSegmentTracker ile
+aynı yapıda ama ayrı bir izde tutulur (source="label"); model episode'larından
+(source="model") bağımsızdır, debounce uygulanmaz.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import (
+    ANOMALY_THRESHOLD,
+    ATTACK_LABEL,
+    EPISODE_EXIT_THRESHOLD,
+    EPISODE_ENTER_FRAMES,
+    EPISODE_EXIT_FRAMES,
+    EPISODE_TOP_K,
+    EPISODE_MAX_STORED,
+)
+
+
+def top_k_sensors(per_feature_z: Dict[str, float], k: int) -> List[Dict]:
+    """
+    per_feature_z içinden en yüksek z'ye sahip k sensörü döner.
+    Tam sıralama yerine argpartition (O(n)) + sadece k elemanın sıralanması.
+    """
+    n = len(per_feature_z)
+    if n == 0 or k <= 0:
+        return []
+
+    names = list(per_feature_z.keys())
+    z = np.fromiter(per_feature_z.values(), dtype=np.float64, count=n)
+
+    k = min(k, n)
+    idx = np.argpartition(-z, k - 1)[:k]
+    idx = idx[np.argsort(-z[idx])]
+
+    return [{"sensor": names[i], "z": float(z[i])} for i in idx]
+
+
+class Episode:
+    __slots__ = (
+        "id",
+        "source",
+        "start_index",
+        "end_index",
+        "start_timestamp",
+        "end_timestamp",
+        "peak_score",
+        "peak_index",
+        "peak_timestamp",
+        "top_sensors",
+        "frames",
+        "open",
+    )
+
+    def __init__(self, episode_id: int, index: int, ts: datetime, source: str = "model"):
+        self.id = episode_id
+        self.source = source
+        self.start_index = index
+        self.end_index = index
+        self.start_timestamp = ts
+        self.end_timestamp = ts
+        self.peak_score = float("-inf")
+        self.peak_index = index
+        self.peak_timestamp = ts
+        self.top_sensors: List[Dict] = []
+        self.frames = 0
+        self.open = True
+
+    def observe(
+        self,
+        index: int,
+        ts: datetime,
+        score: Optional[float],
+        per_feature_z: Dict[str, float],
+    ):
+        # Geri yönlü replay'de index azalabilir; aralığı her iki yöne genişlet
+        if index < self.start_index:
+            self.start_index, self.start_timestamp = index, ts
+        if index > self.end_index:
+            self.end_index, self.end_timestamp = index, ts
+        self.frames += 1
+
+        # top-k sadece tepe değiştiğinde hesaplanır
+        # (score None: label segmentinde pencere henüz dolmamış)
+        if score is not None and score > self.peak_score:
+            self.peak_score = score
+            self.peak_index = index
+            self.peak_timestamp = ts
+            self.top_sensors = top_k_sensors(per_feature_z, EPISODE_TOP_K)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "source": self.source,
+            "start_index": self.start_index,
+            "end_index": self.end_index,
+            "start_timestamp": self.start_timestamp.isoformat(),
+            "end_timestamp": self.end_timestamp.isoformat(),
+            "peak_score": self.peak_score if self.peak_score > float("-inf") else None,
+            "peak_index": self.peak_index,
+            "peak_timestamp": self.peak_timestamp.isoformat(),
+            "top_sensors": self.top_sensors,
+            "frames": self.frames,
+            "open": self.open,
+        }
+
+
+class EpisodeDetector:
+    source = "model"
+
+    def __init__(self):
+        self._next_id = 1
+
+        # Kapanmış episode'lar, start_index'e göre sıralı (paralel listeler)
+        self._starts: List[int] = []
+        self._episodes: List[Episode] = []
+        # En uzun episode süresi; aralık sorgusunda sol sınırı daraltmak için
+        self._max_span = 0
+
+        self.current: Optional[Episode] = None
+
+        # Debounce sayaçları
+        self._above_run = 0
+        self._below_run = 0
+        # idle iken eşik üstü koşunun ilk frame'i ve o ana kadarki frame'ler
+        self._pending: List[tuple] = []
+
+    # ----------------- artımlı güncelleme -------------------
+
+    def update(
+        self,
+        index: int,
+        ts: datetime,
+        prediction: Optional[Dict],
+    ) -> List[Dict]:
+        """
+        Bir frame'i işler, oluşan delta mesajlarını döner
+        ({"type": "episode", "action": "start" | "end", "episode": {...}}).
+        prediction None ise (pencere henüz dolmadı) frame yok sayılır.
+        """
+        if prediction is None:
+            return []
+
+        score = float(prediction["anomaly_score"])
+        per_feature_z = prediction.get("per_feature_z") or {}
+
+        if self.current is None:
+            if score > ANOMALY_THRESHOLD:
+                self._above_run += 1
+                self._pending.append((index, ts, score, per_feature_z))
+            else:
+                self._above_run = 0
+                self._pending = []
+
+            if self._above_run >= EPISODE_ENTER_FRAMES:
+                return [self._open()]
+            return []
+
+        if score < EPISODE_EXIT_THRESHOLD:
+            self._below_run += 1
+            if self._below_run >= EPISODE_EXIT_FRAMES:
+                return [self._close()]
+        else:
+            self._below_run = 0
+            self.current.observe(index, ts, score, per_feature_z)
+
+        return []
+
+    def interrupt(self) -> List[Dict]:
+        """
+        Jump / yeniden bağlanma gibi süreklilik kopmalarında çağrılır.
+        Açık episode varsa o anki haliyle kapatılır, debounce sayaçları sıfırlanır.
+        """
+        deltas = [self._close()] if self.current is not None else []
+        self._above_run = 0
+        self._below_run = 0
+        self._pending = []
+        return deltas
+
+    def _open(self) -> Dict:
+        first_index, first_ts, _, _ = self._pending[0]
+        ep = Episode(self._next_id, first_index, first_ts, self.source)
+        self._next_id += 1
+        for index, ts, score, per_feature_z in self._pending:
+            ep.observe(index, ts, score, per_feature_z)
+
+        self.current = ep
+        self._pending = []
+        self._above_run = 0
+        self._below_run = 0
+        return {"type": "episode", "action": "start", "episode": ep.to_dict()}
+
+    def _close(self) -> Dict:
+        ep = self.current
+        assert ep is not None
+        ep.open = False
+        self.current = None
+        self._below_run = 0
+        self._store(ep)
+        return {"type": "episode", "action": "end", "episode": ep.to_dict()}
+
+    def _store(self, ep: Episode):
+        # Aynı satır aralığı tekrar oynatıldıysa (jump / geri sarma),
+        # çakışan eski episode'lar yenisiyle değiştirilir.
+        lo = bisect_left(self._starts, ep.start_index - self._max_span)
+        hi = bisect_right(self._starts, ep.end_index)
+        keep = [e for e in self._episodes[lo:hi] if e.end_index < ep.start_index]
+        self._episodes[lo:hi] = keep
+        self._starts[lo:hi] = [e.start_index for e in keep]
+
+        pos = bisect_right(self._starts, ep.start_index)
+        self._starts.insert(pos, ep.start_index)
+        self._episodes.insert(pos, ep)
+        self._max_span = max(self._max_span, ep.end_index - ep.start_index)
+
+        # Hafıza sınırı: en eski (en küçük index'li) episode'lar atılır
+        overflow = len(self._episodes) - EPISODE_MAX_STORED
+        if overflow > 0:
+            del self._episodes[:overflow]
+            del self._starts[:overflow]
+
+    # ----------------- sorgu -------------------
+
+    def query(
+        self,
+        start: int | None = None,
+        end: int | None = None,
+        limit: int | None = None,
+    ) -> List[Dict]:
+        """
+        [start, end] satır aralığıyla kesişen episode'ları start_index sırasıyla döner.
+        Açık episode (varsa) aralıkla kesişiyorsa en sona eklenir.
+        limit verilirse aralıktaki en yeni `limit` episode döner.
+        """
+        lo_bound = 0 if start is None else start
+        hi_bound = float("inf") if end is None else end
+
+        lo = 0 if start is None else bisect_left(self._starts, start - self._max_span)
+        hi = len(self._starts) if end is None else bisect_right(self._starts, end)
+
+        result = [
+            e for e in self._episodes[lo:hi]
+            if e.end_index >= lo_bound
+        ]
+
+        cur = self.current
+        if cur is not None and cur.end_index >= lo_bound and cur.start_index <= hi_bound:
+            result.append(cur)
+
+        if limit is not None:
+            result = result[-limit:] if limit > 0 else []
+
+        return [e.to_dict() for e in result]
+
+    def __len__(self) -> int:
+        return len(self._episodes)
+
+
+class LabelSegmentTracker(EpisodeDetector):
+    """
+    Ground-truth atak segmentleri: label == ATTACK_LABEL olan ilk frame'de açılır,
+    label değişince kapanır. Saklama / sorgu / interrupt EpisodeDetector ile aynıdır;
+    tepe skor ve top-k sensör varsa modelin tahmininden alınır.
+    """
+
+    source = "label"
+
+    def update(
+        self,
+        index: int,
+        ts: datetime,
+        label,
+        prediction: Optional[Dict] = None,
+    ) -> List[Dict]:
+        score = None if prediction is None else float(prediction["anomaly_score"])
+        per_feature_z = (prediction or {}).get("per_feature_z") or {}
+
+        if label != ATTACK_LABEL:
+            return [self._close()] if self.current is not None else []
+
+        if self.current is None:
+            self._pending = [(index, ts, score, per_feature_z)]
+            return [self._open()]
+
+        self.current.observe(index, ts, score, per_feature_z)
+        return []
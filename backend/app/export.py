@@ -0,0 +1,170 @@
+"""
+Export modülü
+
+Bu modülün görevi:
+- İstenen satır aralığını replay.iter_replay_chunks ile chunk chunk dolaşmak
+- Her chunk'taki pencereleri (windows.WindowPipeline'ın ölçeklenmiş matrisi
+  üzerindeki sliding_window_view'dan) tek batch'te skorlamak
+- Skorlanan chunk'ları hazır olur olmaz NDJSON ya da Arrow IPC stream
+  byte'larına çevirip yield etmek
+
+Hafıza kullanımı aralık uzunluğundan bağımsızdır: aynı anda sadece bir chunk
+(en fazla EXPORT_MAX_CHUNK pencere) işlenir ve normalizasyon buffer'ı
+chunk'lar arasında tekrar kullanılır.
+
+Skorlama deterministiktir (latent mu kullanılır), aynı aralığın
+export'u her seferinde aynı sonucu verir.
+
+Arrow formatı opsiyonel pyarrow bağımlılığını gerektirir. Şema ilk chunk'tan
+çıkarılmaz, capture'dan kurulur (label tipi label_values'tan); hiç label'ı
+olmayan bir chunk şemayı null tipine kilitlemez.
+"""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    WINDOW_SIZE,
+    ANOMALY_THRESHOLD,
+    EXPORT_FIRST_CHUNK,
+    EXPORT_MAX_CHUNK,
+)
+from .replay import iter_replay_chunks
+from .windows import WindowWorkspace
+
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Arrow IPC stream sonu (continuation marker + 0 uzunluk)
+_ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def iter_scored_chunks(
+    dataset,
+    start: int = 0,
+    end: int | None = None,
+    include_sensors: bool = False,
+    include_z: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    [start, end) aralığını skorlanmış DataFrame chunk'ları olarak üretir.
+
+    Kolonlar: index, timestamp, label, anomaly_score, is_attack
+    (+ include_sensors ise ham sensör değerleri, include_z ise z_<sensör> kolonları).
+    İlk WINDOW_SIZE-1 satırın penceresi dolmadığı için skorları boştur (NaN).
+    """
+    model = dataset.model
+    capture = dataset.capture
+    w = WINDOW_SIZE
+    z_cols = [f"z_{c}" for c in model.stats_cols] if include_z else []
+    ws = WindowWorkspace(w, len(capture.feature_cols))
+
+    for lo, hi in iter_replay_chunks(
+        capture,
+        start, end,
+        first_chunk=EXPORT_FIRST_CHUNK,
+        max_chunk=EXPORT_MAX_CHUNK,
+    ):
+        n = hi - lo
+
+        scores = np.full(n, np.nan, dtype=np.float64)
+        z = np.full((n, len(z_cols)), np.nan, dtype=np.float64)
+
+        # Pencere r satırında biter: [r-w+1, r]; ilk skorlanabilir satır w-1
+        first = max(lo, w - 1)
+        if first < hi:
+            batch_scores, per_feat_mse = model.score_range(first, hi, ws, deterministic=True)
+            scores[first - lo:] = batch_scores
+            if include_z:
+                z[first - lo:] = model.feature_z(per_feat_mse)
+
+        out = {
+            "index": np.arange(lo, hi, dtype=np.int64),
+            "timestamp": capture.timestamps[lo:hi].to_numpy(),
+            "label": capture.labels_slice(lo, hi),
+            "anomaly_score": scores,
+            "is_attack": scores > ANOMALY_THRESHOLD,
+        }
+        # Tüm kolonlar DataFrame kurulmadan önce eklenir (tek tek eklemek frame'i parçalar)
+        if include_sensors:
+            out.update(zip(capture.feature_cols, np.asarray(capture.features[lo:hi]).T))
+        if include_z:
+            out.update(zip(z_cols, z.T))
+
+        yield pd.DataFrame(out)
+
+
+def iter_ndjson(chunks: Iterator[pd.DataFrame]) -> Iterator[bytes]:
+    for chunk in chunks:
+        text = chunk.to_json(orient="records", lines=True, date_format="iso")
+        if not text.endswith("\n"):
+            text += "\n"
+        yield text.encode("utf-8")
+
+
+def _arrow_label_type(label_values: list):
+    """label_values'taki (None hariç) değerlerin ortak Arrow tipi; karışıksa string."""
+    import pyarrow as pa
+
+    values = [v for v in label_values if v is not None]
+    if values and all(isinstance(v, bool) for v in values):
+        return pa.bool_()
+    if values and all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return pa.int64()
+    if values and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return pa.float64()
+    return pa.string()
+
+
+def arrow_schema(dataset, include_sensors: bool = False, include_z: bool = False):
+    """iter_scored_chunks kolonlarının sabit Arrow şeması."""
+    import pyarrow as pa
+
+    fields = [
+        pa.field("index", pa.int64()),
+        pa.field("timestamp", pa.timestamp("ns")),
+        pa.field("label", _arrow_label_type(dataset.capture.label_values)),
+        pa.field("anomaly_score", pa.float64()),
+        pa.field("is_attack", pa.bool_()),
+    ]
+    if include_sensors:
+        fields += [pa.field(c, pa.float32()) for c in dataset.capture.feature_cols]
+    if include_z:
+        fields += [pa.field(f"z_{c}", pa.float64()) for c in dataset.model.stats_cols]
+    return pa.schema(fields)
+
+
+def iter_arrow(chunks: Iterator[pd.DataFrame], schema) -> Iterator[bytes]:
+    """
+    Arrow IPC stream: şema mesajı, her chunk için bir record batch, sonda EOS.
+    """
+    import pyarrow as pa
+
+    to_str = pa.types.is_string(schema.field("label").type)
+    yield schema.serialize().to_pybytes()
+    for chunk in chunks:
+        if to_str:
+            # Karışık tipli label'lar string'e çevrilir (boşlar None kalır)
+            chunk["label"] = [None if v is None else str(v) for v in chunk["label"]]
+        batch = pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+        yield batch.serialize().to_pybytes()
+    yield _ARROW_EOS
+
+
+def stream_export(dataset, fmt: str, **kwargs) -> Iterator[bytes]:
+    chunks = iter_scored_chunks(dataset, **kwargs)
+    if fmt == "arrow":
+        schema = arrow_schema(
+            dataset,
+            include_sensors=kwargs.get("include_sensors", False),
+            include_z=kwargs.get("include_z", False),
+        )
+        return iter_arrow(chunks, schema)
+    return iter_ndjson(chunks)
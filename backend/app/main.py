@@ -1,15 +1,23 @@
 import asyncio
-from datetime import datetime
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import importlib.util
+import time
+from datetime import datetime, timezone
+from fastapi import (
+    APIRouter,
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
-from .model import SwatVaeLstmModel
-from .replay import load_dataframe, build_timestamps
-from .config import (
-    FEATURE_COLS,
-    LABEL_COL,
-    DEFAULT_SPEED,
-)
+from .datasets import Dataset, describe_datasets, get_dataset, load_datasets
+from .whatif import WhatIfRequest, run_whatif
+from .export import EXPORT_FORMATS, stream_export
+from .config import STREAM_QUEUE_MAX, WINDOW_SIZE
 
 
 app = FastAPI()
@@ -24,63 +32,73 @@ app.add_middleware(
 
 
 # ============================================================
-# PLAYBACK STATE
+# DATASET LOAD
 # ============================================================
 
-class PlaybackState:
-    def __init__(self):
-        self.speed: float = DEFAULT_SPEED  # 1.0 = normal hız
-        self.playing: bool = True          # play/pause
-        self.direction: int = 1            # +1: ileri, -1: geri
-        self.current_index: int = 0        # hangi satırdayız
-        self.jump_requested: bool = False  # jump talebi varsa True
-        self.jump_to: int = 0              # jump hedef index
+# Tüm dataset'ler (veri memory-mapped, aynı model dosyası tek sefer yüklenir)
+# process açılırken hazırlanır. Her dataset'in kendi playback state'i,
+# model penceresi ve episode geçmişi vardır.
+load_datasets()
 
-state = PlaybackState()
 
+def resolve_dataset(dataset: str | None = None) -> Dataset:
+    """
+    /datasets/{dataset}/... altında path'ten, prefix'siz (eski) endpoint'lerde
+    opsiyonel ?dataset= query'sinden gelir; verilmezse varsayılan dataset.
+    """
+    try:
+        return get_dataset(dataset)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Bilinmeyen dataset: {dataset}")
 
-# ============================================================
-# MODEL & DATA LOAD
-# ============================================================
 
-# Model tek sefer yüklenecek
-model = SwatVaeLstmModel()
+# Dataset'e bağlı endpoint'ler bu router'da; app'e iki kez eklenir:
+# prefix'siz (varsayılan dataset) ve /datasets/{dataset} prefix'iyle.
+router = APIRouter()
+
 
-# Replay verisi (df ve timestamps tek seferlik yüklenir)
-df = load_dataframe()
-timestamps = build_timestamps(df)
-N = len(df)
+@app.get("/datasets")
+def list_datasets():
+    """
+    Servis edilen dataset'ler ve dataset başına hafıza kullanımı.
+    """
+    return {"datasets": describe_datasets()}
 
 
 # ============================================================
 # REST Endpoints (Kontrol API)
 # ============================================================
 
-@app.get("/status")
-def get_status():
+@router.get("/status")
+def get_status(ds: Dataset = Depends(resolve_dataset)):
+    state = ds.state
     return {
+        "dataset": ds.name,
         "playing": state.playing,
         "speed": state.speed,
         "direction": state.direction,
         "current_index": state.current_index,
-        "total_rows": N,
+        "total_rows": ds.N,
     }
 
 
-@app.post("/control/play")
-def play():
+@router.post("/control/play")
+def play(ds: Dataset = Depends(resolve_dataset)):
+    state = ds.state
     state.playing = True
     return {"status": "ok", "playing": True}
 
 
-@app.post("/control/pause")
-def pause():
+@router.post("/control/pause")
+def pause(ds: Dataset = Depends(resolve_dataset)):
+    state = ds.state
     state.playing = False
     return {"status": "ok", "playing": False}
 
 
-@app.post("/control/speed/{factor}")
-def set_speed(factor: float):
+@router.post("/control/speed/{factor}")
+def set_speed(factor: float, ds: Dataset = Depends(resolve_dataset)):
+    state = ds.state
     if factor <= 0:
         factor = 0.1
     elif factor > 20:
@@ -90,15 +108,18 @@ def set_speed(factor: float):
     return {"status": "ok", "speed": state.speed}
 
 
-@app.post("/control/direction/{dir_flag}")
-def set_direction(dir_flag: int):
+@router.post("/control/direction/{dir_flag}")
+def set_direction(dir_flag: int, ds: Dataset = Depends(resolve_dataset)):
+    state = ds.state
     # 1: ileri, -1: geri
     state.direction = 1 if dir_flag >= 0 else -1
     return {"status": "ok", "direction": state.direction}
 
 
-@app.post("/control/jump/{index}")
-def jump_to_index(index: int):
+@router.post("/control/jump/{index}")
+def jump_to_index(index: int, ds: Dataset = Depends(resolve_dataset)):
+    state = ds.state
+    N = ds.N
     if index < 0:
         index = 0
     elif index >= N:
@@ -109,72 +130,313 @@ def jump_to_index(index: int):
     return {"status": "ok", "jump_to": index}
 
 
-# ============================================================
-# WEBSOCKET STREAM
-# ============================================================
+@router.get("/events")
+def get_events(
+    start: int | None = Query(None, ge=0),
+    end: int | None = Query(None, ge=0),
+    limit: int | None = Query(None, ge=0),
+    source: str = "model",
+    ds: Dataset = Depends(resolve_dataset),
+):
+    """
+    [start, end] satır aralığıyla kesişen atak episode'ları.
+    Parametre verilmezse tüm geçmiş (ve varsa açık episode) döner.
+
+    source: "model" (anomaly score episode'ları), "label" (ground-truth atak
+    segmentleri) ya da "all" (ikisi, start_index sırasıyla; limit birleşik listeye).
+    """
+    trackers = {"model": [ds.episodes], "label": [ds.label_segments]}
+    trackers["all"] = trackers["model"] + trackers["label"]
+    if source not in trackers:
+        raise HTTPException(
+            status_code=400,
+            detail=f"source şunlardan biri olmalı: {', '.join(trackers)}",
+        )
+
+    items = [e for t in trackers[source] for e in t.query(start=start, end=end, limit=limit)]
+    if len(trackers[source]) > 1:
+        items.sort(key=lambda e: e["start_index"])
+        if limit is not None:
+            items = items[-limit:] if limit > 0 else []
+    return {
+        "episodes": items,
+        "count": len(items),
+        "total_stored": sum(len(t) for t in trackers[source]),
+    }
 
-@app.websocket("/ws/stream")
-async def ws_stream(ws: WebSocket):
-    await ws.accept()
 
-    # Başlangıç index'i
-    state.current_index = 0
+@router.post("/whatif")
+def what_if(req: WhatIfRequest, ds: Dataset = Depends(resolve_dataset)):
+    """
+    Canlı pencereye (index verilmezse) veya index'te biten pencereye
+    senaryoları uygular, hepsini tek batch'te skorlar.
+    """
+    model = ds.model
+    N = ds.N
+    if req.index is None:
+        if not model.ready():
+            raise HTTPException(status_code=409, detail="Model penceresi henüz dolmadı.")
+        window = ds.features[model.window_rows()]
+    else:
+        if not (WINDOW_SIZE - 1 <= req.index < N):
+            raise HTTPException(
+                status_code=400,
+                detail=f"index {WINDOW_SIZE - 1} ile {N - 1} arasında olmalı.",
+            )
+        window = ds.window_at(req.index, WINDOW_SIZE)
 
     try:
-        while True:
-
-            # Pause durumunda bekle
-            while not state.playing:
-                await asyncio.sleep(0.1)
+        result = run_whatif(model, window, req.scenarios)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Bilinmeyen sensör: {e.args[0]}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"index": req.index, **result}
+
+
+def _naive_utc(t: datetime) -> datetime:
+    """Capture timestamp'leri tz'sizdir; offset'li zaman önce UTC'ye çevrilir."""
+    if t.tzinfo is None:
+        return t
+    return t.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/export")
+def export(
+    start: int | None = Query(None, ge=0),
+    end: int | None = Query(None, ge=0),
+    start_time: datetime | None = None,
+    end_time: datetime | None = None,
+    format: str = "ndjson",
+    include_sensors: bool = False,
+    include_z: bool = False,
+    ds: Dataset = Depends(resolve_dataset),
+):
+    """
+    [start, end) satır aralığını (veya [start_time, end_time) zaman aralığını)
+    skorlayarak NDJSON ya da Arrow IPC stream olarak akıtır.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format şunlardan biri olmalı: {', '.join(EXPORT_FORMATS)}",
+        )
+    if format == "arrow" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail="Arrow export için pyarrow kurulu değil.")
+
+    timestamps = ds.timestamps
+    N = ds.N
+
+    # Zaman aralığı verildiyse satır index'ine çevir (timestamp'ler sıralı)
+    if start_time is not None:
+        start = int(timestamps.searchsorted(_naive_utc(start_time), side="left"))
+    if end_time is not None:
+        end = int(timestamps.searchsorted(_naive_utc(end_time), side="left"))
+
+    start = 0 if start is None else start
+    end = N if end is None else min(end, N)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Boş aralık: start < end olmalı.")
+
+    body = stream_export(
+        ds,
+        format,
+        start=start,
+        end=end,
+        include_sensors=include_sensors,
+        include_z=include_z,
+    )
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"X-Export-Rows": str(end - start)},
+    )
 
-            # Jump isteği varsa
-            if state.jump_requested:
-                state.current_index = state.jump_to
-                # window'ı sıfırla, model tekrar doldurmaya başlasın
-                model.buffer = []
-                state.jump_requested = False
 
-            i = state.current_index
-
-            # İleri–geri yönüne göre index güncellemesi
-            next_i = i + state.direction
-
-            # Sınır kontrolü
-            if next_i < 0:
-                next_i = 0
-            if next_i >= N:
-                next_i = N - 1
-
-            # Timestamp farkına göre bekleme (canlı akış efekti)
-            if i > 0:
-                dt_real = (timestamps[next_i] - timestamps[i]).total_seconds()
-                await asyncio.sleep(max(dt_real / state.speed, 0))
-
-            # Satırı al
-            row_dict = df.iloc[i].to_dict()
-            ts = timestamps[i]
+# ============================================================
+# WEBSOCKET STREAM
+# ============================================================
 
-            # Model pencere güncelle + inference
-            model.update_window(row_dict)
-            prediction = model.predict() if model.ready() else None
+# Bir dataset'in satırlarını tek bir producer task'ı oynatır; model penceresi ve
+# episode dedektörü her satırı bir kez görür. Frame ve episode delta mesajları
+# o dataset'e bağlı tüm socket'lerin kuyruklarına yayınlanır.
+# Producer ilk socket bağlanınca başlar (imleç başa alınır), son socket
+# ayrılınca durur; sonradan bağlanan socket'ler akışa olduğu yerden katılır.
+
+_subscribers: dict[str, set[asyncio.Queue]] = {}
+_producers: dict[str, asyncio.Task] = {}
+
+
+def _broadcast(ds: Dataset, msg: dict | None):
+    for queue in list(_subscribers.get(ds.name, ())):
+        try:
+            queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            # Yetişemeyen client: kuyruğu boşaltıp kapatma sinyali bırak
+            _subscribers[ds.name].discard(queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+
+def _restart_playback(ds: Dataset) -> list[dict]:
+    """
+    Yeni oynatma başlarken imleci başa alır. Süreklilik koptuğu için model
+    penceresi sıfırlanır ve açık episode kapatılır (aksi halde 0'dan gelen
+    frame'ler eski episode'u geriye doğru genişletip geçmişi silerdi).
+    """
+    ds.state.current_index = 0
+    ds.state.jump_requested = False
+    ds.model.reset_window()
+    return ds.episodes.interrupt() + ds.label_segments.interrupt()
+
+
+async def _play(ds: Dataset):
+    state, model, episodes, segments = ds.state, ds.model, ds.episodes, ds.label_segments
+    features, timestamps, N = ds.features, ds.timestamps, ds.N
+    feature_cols, capture = ds.feature_cols, ds.capture
+
+    for delta in _restart_playback(ds):
+        _broadcast(ds, delta)
+
+    while True:
+
+        # Pause durumunda bekle
+        while not state.playing:
+            await asyncio.sleep(0.1)
+
+        # Jump isteği varsa
+        if state.jump_requested:
+            state.current_index = state.jump_to
+            # window'ı sıfırla, model tekrar doldurmaya başlasın
+            model.reset_window()
+            state.jump_requested = False
+            # süreklilik koptu, açık episode / segment kapatılır
+            for delta in episodes.interrupt() + segments.interrupt():
+                _broadcast(ds, delta)
+
+        i = state.current_index
+
+        # İleri–geri yönüne göre index güncellemesi
+        next_i = i + state.direction
+
+        # Sınır kontrolü
+        if next_i < 0:
+            next_i = 0
+        if next_i >= N:
+            next_i = N - 1
+
+        # Timestamp farkına göre bekleme (canlı akış efekti)
+        if i > 0:
+            dt_real = (timestamps[next_i] - timestamps[i]).total_seconds()
+            await asyncio.sleep(max(dt_real / state.speed, 0))
+
+        # Satırı al
+        row = features[i]
+        ts = timestamps[i]
+
+        # Model pencere güncelle + inference
+        model.update_window(i)
+        prediction = model.predict() if model.ready() else None
+
+        label = capture.label_at(i)
+
+        # UI’ya gönderilecek mesaj
+        _broadcast(ds, {
+            "index": i,
+            "timestamp": ts.isoformat(),
+            "sensors": dict(zip(feature_cols, row.tolist())),
+            "label": label,
+            "prediction": prediction,
+            # yayın anı (epoch s); client'ın teslim gecikmesi ölçümü için (tools/loadtest.py)
+            "sent_at": time.time(),
+        })
+
+        # Episode / label segmenti başlangıç / bitişi ayrı delta mesajları olarak gider
+        for delta in episodes.update(i, ts, prediction) + segments.update(i, ts, label, prediction):
+            _broadcast(ds, delta)
+
+        # Bir sonraki adıma ilerle
+        state.current_index = next_i
+
+
+async def _run_producer(ds: Dataset):
+    try:
+        await _play(ds)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print("Playback error:", e)
+        # Bağlı socket'ler kapatılsın
+        _broadcast(ds, None)
+    finally:
+        # Yeniden bağlanmada yerine yenisi başlamış olabilir; sadece kendini sil
+        if _producers.get(ds.name) is asyncio.current_task():
+            del _producers[ds.name]
+
+
+async def _send_loop(ws: WebSocket, queue: asyncio.Queue):
+    while True:
+        msg = await queue.get()
+        if msg is None:
+            # Client yetişemedi ya da oynatma hata verdi
+            await ws.close(code=1013)
+            return
+        await ws.send_json(msg)
+
+
+async def _wait_disconnect(ws: WebSocket):
+    # Client'tan gelen mesajlar kullanılmaz; sadece kapanış beklenir
+    while True:
+        msg = await ws.receive()
+        if msg["type"] == "websocket.disconnect":
+            return
+
+
+@router.websocket("/ws/stream")
+async def ws_stream(ws: WebSocket, dataset: str | None = None):
+    try:
+        ds = get_dataset(dataset)
+    except KeyError:
+        await ws.close(code=1008, reason=f"Bilinmeyen dataset: {dataset}")
+        return
 
-            # UI’ya gönderilecek mesaj
-            msg = {
-                "index": i,
-                "timestamp": ts.isoformat(),
-                "sensors": {c: float(row_dict[c]) for c in FEATURE_COLS},
-                "label": row_dict[LABEL_COL] if LABEL_COL in row_dict else None,
-                "prediction": prediction,
-            }
+    await ws.accept()
 
-            await ws.send_json(msg)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_MAX)
+    subscribers = _subscribers.setdefault(ds.name, set())
+    subscribers.add(queue)
+    if ds.name not in _producers:
+        _producers[ds.name] = asyncio.create_task(_run_producer(ds))
 
-            # Bir sonraki adıma ilerle
-            state.current_index = next_i
+    # Gönderim ve disconnect dinleme yan yana: pause'da frame gitmese de
+    # kopan client hemen fark edilir
+    sender = asyncio.create_task(_send_loop(ws, queue))
+    receiver = asyncio.create_task(_wait_disconnect(ws))
+    try:
+        done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        if receiver in done:
+            print("Client disconnected.")
+        else:
+            sender.result()
 
     except WebSocketDisconnect:
         print("Client disconnected.")
     except Exception as e:
         print("WebSocket error:", e)
         # Starlette zaten kapatıyor, ekstra close çağrısına gerek yok
-        # await ws.close()
\ No newline at end of file
+        # await ws.close()
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        subscribers.discard(queue)
+        if not subscribers:
+            producer = _producers.pop(ds.name, None)
+            if producer is not None:
+                producer.cancel()
+
+
+# Prefix'siz eski endpoint'ler (varsayılan dataset) + dataset bazlı endpoint'ler
+app.include_router(router)
+app.include_router(router, prefix="/datasets/{dataset}")
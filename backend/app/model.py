@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 import torch
 import json
 import torch.nn as nn
@@ -7,27 +6,24 @@ from pathlib import Path
 from sklearn.preprocessing import StandardScaler
 
 from .config import (
-    MODEL_PATH,
-    CSV_PATH,
-    FEATURE_COLS,
-    N_FEATURES,
     WINDOW_SIZE,
     USE_SCALER,
     SCALER_PATH,
     RECOMPUTE_SCALER_FROM_CSV_IF_MISSING,
-    LABEL_COL,
     ANOMALY_THRESHOLD,
     SENSOR_STATS_PATH,
     Z_WARNING,
     Z_CRITICAL,   
     Z_MAX_FOR_INTENSITY,
-    APPLY_WINDOW_NORM,
-    WINDOW_NORM_EPS,
 )
+from .windows import WindowPipeline, WindowWorkspace
 
 
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
+# Scaler fit edilirken tek seferde okunan satır sayısı
+_SCALER_FIT_CHUNK = 100_000
+
 
 # ============================================================
 # 1) VAELSTMv2 mimarisi (notebook ile aynı)
@@ -101,20 +97,22 @@ class VAELSTMv2(nn.Module):
 # 2) Scaler yükleme / oluşturma
 # ============================================================
 
-def load_or_fit_scaler() -> StandardScaler | None:
+def load_or_fit_scaler(features: np.ndarray) -> StandardScaler | None:
+    """
+    features: (N, feat) capture feature matrisi (memmap olabilir).
+    Kayıtlı scaler yoksa bu matristen chunk chunk (partial_fit) fit edilir;
+    böylece tüm capture float64 olarak hafızaya alınmaz.
+    """
     if USE_SCALER and SCALER_PATH.exists():
         print(f"[Scaler] Loading from {SCALER_PATH}")
         import joblib
         return joblib.load(SCALER_PATH)
 
     if USE_SCALER and RECOMPUTE_SCALER_FROM_CSV_IF_MISSING:
-        print("[Scaler] Fitting new scaler from CSV…")
-        df = pd.read_csv(CSV_PATH)
-        if LABEL_COL in df.columns:
-            df = df.drop(columns=[LABEL_COL])
-
+        print("[Scaler] Fitting new scaler from capture…")
         scaler = StandardScaler()
-        scaler.fit(df[FEATURE_COLS].values)
+        for lo in range(0, len(features), _SCALER_FIT_CHUNK):
+            scaler.partial_fit(features[lo:lo + _SCALER_FIT_CHUNK])
         return scaler
 
     print("[Scaler] Scaler disabled.")
@@ -148,7 +146,7 @@ def load_sensor_stats(path: Path) -> dict | None:
 # 3) Model state_dict yükleyici
 # ============================================================
 
-def load_torch_model(model_path: Path) -> nn.Module:
+def load_torch_model(model_path: Path, input_dim: int) -> nn.Module:
     if not model_path.exists():
         raise FileNotFoundError(f"Model dosyası bulunamadı: {model_path}")
 
@@ -170,7 +168,7 @@ def load_torch_model(model_path: Path) -> nn.Module:
     dropout = 0.1
 
     model = VAELSTMv2(
-        input_dim=N_FEATURES,
+        input_dim=input_dim,
         hidden_dim=hidden_dim,
         latent_dim=latent_dim,
         num_layers=num_layers,
@@ -187,130 +185,181 @@ def load_torch_model(model_path: Path) -> nn.Module:
     return model
 
 
+# Aynı ağırlık dosyasını kullanan dataset'ler tek bir nn.Module paylaşır
+# (eval modunda, no_grad altında; forward state tutmaz).
+_model_cache: dict[tuple[Path, int], nn.Module] = {}
+
+
+def get_shared_model(model_path: Path, input_dim: int) -> nn.Module:
+    key = (model_path.resolve(), input_dim)
+    if key not in _model_cache:
+        _model_cache[key] = load_torch_model(model_path, input_dim)
+    else:
+        print(f"[Model] Reusing loaded weights: {model_path}")
+    return _model_cache[key]
+
+
 # ============================================================
 # 4) Ana inference sınıfı
 # ============================================================
 
 class SwatVaeLstmModel:
-    def __init__(self):
-        self.model = load_torch_model(MODEL_PATH)
-        self.scaler = load_or_fit_scaler()
+    def __init__(self, model_path: Path, feature_cols: list[str], pipeline: WindowPipeline):
+        self.model_path = model_path
+        self.model = get_shared_model(model_path, len(feature_cols))
+
+        # Ölçekleme + pencere normalizasyonu (scaler pipeline'da)
+        self.pipeline = pipeline
 
-        self.feature_cols = FEATURE_COLS
+        self.feature_cols = feature_cols
         self.window_size = WINDOW_SIZE
-        self.buffer: list[list[float]] = []
+
+        # Canlı pencere: son window_size ziyaret edilen satırın index'i (ziyaret sırasıyla).
+        # Satır değerleri değil index tutulur; değerler pipeline'ın ölçeklenmiş matrisinden gelir.
+        self._rows = np.zeros(self.window_size, dtype=np.intp)
+        self._filled = 0
+        # Canlı tick'lerde tekrar kullanılan normalizasyon buffer'ı
+        self._live_ws = WindowWorkspace(self.window_size, len(feature_cols))
 
         # sensör hata istatistikleri (JSON'dan)
         self.sensor_stats: dict | None = load_sensor_stats(SENSOR_STATS_PATH)
 
+        # z-skor hesabı için stats'ı olan sensörlerin index / mean / std dizileri
+        self._stats_idx, self._stats_mu, self._stats_sigma = self._stats_arrays()
+
+    def _stats_arrays(self):
+        idx, mu, sigma = [], [], []
+        if self.sensor_stats is not None:
+            for i, col in enumerate(self.feature_cols):
+                stats = self.sensor_stats.get(col)
+                # Eğer bu sensör stats dosyasında yoksa, atla
+                if not stats:
+                    continue
+                idx.append(i)
+                mu.append(float(stats.get("mean", 0.0)))
+                sigma.append(float(stats.get("std", 0.0)))
+
+        # Çok küçük sigma'larda patlamasın diye alt limite clamp
+        sigma_arr = np.maximum(np.array(sigma, dtype=np.float64), 1e-8)
+        return np.array(idx, dtype=np.intp), np.array(mu, dtype=np.float64), sigma_arr
+
     # ----------------- pencere güncelleme -------------------
 
-    def update_window(self, row: dict):
-        x = [float(row[col]) for col in self.feature_cols]
-        self.buffer.append(x)
-        if len(self.buffer) > self.window_size:
-            self.buffer.pop(0)
+    def update_window(self, index: int):
+        # index: capture'da ziyaret edilen satır
+        self._rows[:-1] = self._rows[1:]
+        self._rows[-1] = index
+        self._filled = min(self._filled + 1, self.window_size)
+
+    def reset_window(self):
+        self._filled = 0
 
     def ready(self) -> bool:
-        return len(self.buffer) == self.window_size
+        return self._filled == self.window_size
+
+    def window_rows(self) -> np.ndarray:
+        """Canlı penceredeki satır index'leri (en eskiden en yeniye)."""
+        return self._rows[self.window_size - self._filled:]
+
+    # ----------------- forward ------------------------------
 
-    # ----------------- inference / anomaly ------------------
-    
     @torch.no_grad()
-    def predict(self):
+    def score_normalized(self, x: np.ndarray, deterministic: bool = False):
         """
-        VAE-LSTM reconstruction error tabanlı anomaly score + sensör bazlı sapma.
+        Normalize edilmiş (batch, seq_len, feat) float32 batch'i tek forward pass'te skorlar.
+        torch.from_numpy kopya yapmaz (CPU'da .to(DEVICE) de no-op).
+
+        Returns:
+            anomaly_scores: (batch,) pencere başına reconstruction MSE
+            per_feat_mse:   (batch, feat) zaman üzerinden ortalama sensör MSE'si
 
-        Normalizasyon pipeline'ı notebook ile birebir aynı:
-        1) Global StandardScaler
-        2) Her pencere için per-window z-score (zaman ekseni boyunca)
+        deterministic=True ise latent örnekleme yerine mu kullanılır;
+        aynı batch'teki varyantlar aynı gürültüyle karşılaştırılabilsin diye.
         """
+        x = torch.from_numpy(x).to(DEVICE)  # (batch, seq_len, feat)
+
+        if deterministic:
+            mu, _ = self.model.encode(x)
+            recon = self.model.decode(mu, x.size(1))
+        else:
+            recon, _, _ = self.model(x)
 
-        # self.buffer: [ [feat1,...,featN], ... ]  length = window_size
-        window = np.array(self.buffer, dtype=np.float32)  # (seq_len, feat)
+        sq_err = (x - recon) ** 2                     # (batch, seq_len, feat)
+        per_feat_mse = sq_err.mean(dim=1)             # (batch, feat)
+        anomaly_scores = per_feat_mse.mean(dim=1)     # (batch,)
+        return anomaly_scores.cpu().numpy(), per_feat_mse.cpu().numpy()
 
-        # 1) Global scaler (notebook'ta X_train_scaled ile yaptığın)
-        if self.scaler is not None:
-            window = self.scaler.transform(window)
+    def score_range(self, lo: int, hi: int, ws: WindowWorkspace, deterministic: bool = False):
+        """
+        [lo, hi) satırlarında biten pencereleri skorlar (sliding_window_view üzerinden,
+        ws buffer'ına normalize edilerek). lo >= window_size - 1 olmalı.
+        """
+        return self.score_normalized(self.pipeline.normalized_range(lo, hi, ws), deterministic)
 
-        # 2) Per-window z-score normalizasyonu (WindowDataset.apply_window_norm=True ile aynı)
-        if APPLY_WINDOW_NORM:
-            mean = window.mean(axis=0, keepdims=True)               # (1, feat)
-            std = window.std(axis=0, keepdims=True, ddof=1) + WINDOW_NORM_EPS
-            window = (window - mean) / std
+    def score_windows(self, windows: np.ndarray, deterministic: bool = False):
+        """
+        (batch, seq_len, feat) ham (ölçeklenmemiş) pencereleri skorlar; capture'da
+        olmayan pencereler için (örn. what-if varyantları).
+        """
+        batch, seq_len, n_feat = windows.shape
+        ws = WindowWorkspace(seq_len, n_feat, capacity=batch)
+        return self.score_normalized(self.pipeline.normalized_raw(windows, ws), deterministic)
 
-        # İLERİDE:
-        # Notebook'ta per-window normalizasyonu kapatırsan, sadece
-        # config.py'de APPLY_WINDOW_NORM = False yapman yeterli olacak.
+    @property
+    def stats_cols(self) -> list[str]:
+        """Stats dosyasında olan (z-skoru hesaplanabilen) sensörler, feature sırasıyla."""
+        return [self.feature_cols[i] for i in self._stats_idx]
 
-        # 3) PyTorch tensöre çevir ve modele ver
-        x = torch.tensor(window, dtype=torch.float32, device=DEVICE).unsqueeze(0)  # (1, seq_len, feat)
+    def feature_z(self, per_feat_mse: np.ndarray) -> np.ndarray:
+        """
+        (..., feat) sensör MSE'lerinden (..., len(stats_cols)) z-skorları.
+        """
+        err = per_feat_mse[..., self._stats_idx].astype(np.float64)
+        return (err - self._stats_mu) / self._stats_sigma
 
-        recon, mu, logvar = self.model(x)
+    def feature_diagnostics(self, per_feat_mse: np.ndarray) -> dict:
+        """
+        Tek pencerenin (feat,) sensör MSE'lerinden z-skor, seviye ve intensity üretir.
+        Stats dosyasında olmayan sensörler çıktıda yer almaz.
+        """
+        err = per_feat_mse[self._stats_idx].astype(np.float64)
+        z = self.feature_z(per_feat_mse)
 
-        # 1) Global reconstruction error (MSE)
-        sq_err = (x - recon) ** 2  # (1, seq_len, feat)
-        mse = torch.mean(sq_err).item()
+        # seviye belirle
+        levels = np.where(
+            z >= Z_CRITICAL, "critical", np.where(z >= Z_WARNING, "warning", "normal")
+        )
 
-        anomaly_score = float(mse)
-        is_attack = anomaly_score > ANOMALY_THRESHOLD
+        # Heatmap / intensity için 0–1'e sıkıştır
+        # 0 σ → 0, Z_MAX_FOR_INTENSITY σ ve üzeri → 1
+        intensity = np.clip(z / Z_MAX_FOR_INTENSITY, 0.0, 1.0)
 
-        # 2) Sensör bazlı reconstruction error: (feat,)
-        # Zaman ve batch üzerinden ortalama
-        per_feat_mse_t = sq_err.mean(dim=(0, 1))  # (feat,)
-        per_feat_mse = per_feat_mse_t.detach().cpu().numpy()
+        cols = self.stats_cols
+        return {
+            "per_feature_error": dict(zip(cols, err.tolist())),         # ham MSE
+            "per_feature_z": dict(zip(cols, z.tolist())),               # kaç σ
+            "per_feature_flag": dict(zip(cols, levels.tolist())),       # normal / warning / critical
+            "per_feature_intensity": dict(zip(cols, intensity.tolist())), # 0–1, heatmap için ideal
+        }
 
-        per_feature_error: dict[str, float] = {}
-        per_feature_z: dict[str, float] = {}
-        per_feature_flag: dict[str, str] = {}
-        per_feature_intensity: dict[str, float] = {}
+    # ----------------- inference / anomaly ------------------
 
-        if self.sensor_stats is not None:
-            for i, col in enumerate(self.feature_cols):
-                err_val = float(per_feat_mse[i])
-                stats = self.sensor_stats.get(col)
+    def predict(self):
+        """
+        VAE-LSTM reconstruction error tabanlı anomaly score + sensör bazlı sapma.
+        """
 
-                # Eğer bu sensör stats dosyasında yoksa, atla
-                if not stats:
-                    continue
+        # Ölçeklenmiş matristen pencere satırları, tekrar kullanılan buffer'a normalize edilir
+        x = self.pipeline.normalized_rows(self.window_rows(), self._live_ws)
+        scores, per_feat_mse = self.score_normalized(x)
+
+        anomaly_score = float(scores[0])
+        is_attack = anomaly_score > ANOMALY_THRESHOLD
 
-                mu = float(stats.get("mean", 0.0))
-                sigma = float(stats.get("std", 0.0))
-                # Çok küçük sigma'larda patlamasın diye alt limite clamp
-                if sigma < 1e-8:
-                    sigma = 1e-8
-
-                z = (err_val - mu) / sigma
-
-                # seviye belirle
-                if z >= Z_CRITICAL:
-                    level = "critical"
-                elif z >= Z_WARNING:
-                    level = "warning"
-                else:
-                    level = "normal"
-
-                # Heatmap / intensity için 0–1'e sıkıştır
-                # 0 σ → 0, Z_MAX_FOR_INTENSITY σ ve üzeri → 1
-                if z <= 0:
-                    intensity = 0.0
-                else:
-                    intensity = min(z / Z_MAX_FOR_INTENSITY, 1.0)
-
-                per_feature_error[col] = err_val
-                per_feature_z[col] = float(z)
-                per_feature_flag[col] = level
-                per_feature_intensity[col] = float(intensity)
-
-        # 3) UI için dönecek yapı
+        # UI için dönecek yapı
         return {
             "anomaly_score": anomaly_score,
             "is_attack": is_attack,
             # sensör bazlı bilgiler:
-            "per_feature_error": per_feature_error,         # ham MSE
-            "per_feature_z": per_feature_z,                 # kaç σ
-            "per_feature_flag": per_feature_flag,           # normal / warning / critical
-            "per_feature_intensity": per_feature_intensity, # 0–1, heatmap için ideal
+            **self.feature_diagnostics(per_feat_mse[0]),
         }
-
-
@@ -2,11 +2,15 @@
 Replay modülü
 
 Bu modülün görevi:
-- SWaT CSV dosyasını okumak
-- START_ROW / END_ROW aralığını uygulamak
+- SWaT CSV dosyasını bir kez memory-mapped .npy cache'lerine çevirmek
+  (feature matrisi float32, timestamp'ler int64 ns, label'lar kod olarak)
+- Bu cache'leri np.load(mmap_mode="r") ile açmak; böylece veri process
+  heap'ine kopyalanmaz, sayfalar ihtiyaç oldukça OS tarafından okunur
+  ve aynı dosyayı açan process'ler page cache'i paylaşır
+- START_ROW / END_ROW aralığını uygulamak (kopyasız slice)
 - Her satır için bir "logical timestamp" üretmek
-- main.py içindeki WebSocket döngüsünün kullanabileceği
-  bir iterator sağlamak.
+- Veriyi satır satır değil, büyüyen chunk'lar halinde dolaşan
+  bir iterator sağlamak (export gibi toplu işler için).
 
 Zaman mantığı:
 - Eğer TIMESTAMP_COL tanımlı ve USE_SYNTHETIC_TIME = False ise:
@@ -18,13 +22,17 @@ Zaman mantığı:
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Dict, Iterator, Tuple, Optional
+import hashlib
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 
 from .config import (
-    CSV_PATH,
     LABEL_COL,
     TIMESTAMP_COL,
     USE_SYNTHETIC_TIME,
@@ -32,75 +40,250 @@ from .config import (
     STEP_SECONDS,
     START_ROW,
     END_ROW,
+    DATA_CACHE_DIR,
+    infer_feature_cols_from_csv,
 )
 
 
+# CSV -> cache dönüşümünde tek seferde okunan satır sayısı
+_CONVERT_CHUNK_ROWS = 100_000
+
+# Cache formatı değişince artırılır; eski cache'ler yeniden üretilir
+_CACHE_VERSION = 2
+
+
+class MappedCapture:
+    """
+    Bir CSV capture'ının memory-mapped hali (START_ROW / END_ROW uygulanmış).
+
+    features:   (N, feat) float32, read-only memmap
+    timestamps: (N,) pd.DatetimeIndex
+    labels:     (N,) int16 label kodları (label_values[kod] = orijinal değer,
+                boş label için None), label kolonu yoksa None
+    mapped_files: bu capture için mmap ile açılan .npy dosyaları
+    """
+
+    def __init__(
+        self,
+        csv_path: Path,
+        cache_dir: Path,
+        feature_cols: list[str],
+        features: np.ndarray,
+        timestamps: pd.DatetimeIndex,
+        labels: Optional[np.ndarray],
+        label_values: list,
+        mapped_files: Optional[list[Path]] = None,
+    ):
+        self.csv_path = csv_path
+        self.cache_dir = cache_dir
+        self.feature_cols = feature_cols
+        self.features = features
+        self.timestamps = timestamps
+        self.labels = labels
+        self.label_values = label_values
+        self.mapped_files = mapped_files or []
+
+    def __len__(self) -> int:
+        return self.features.shape[0]
+
+    def label_at(self, i: int):
+        if self.labels is None:
+            return None
+        return self.label_values[self.labels[i]]
+
+    def labels_slice(self, lo: int, hi: int) -> np.ndarray:
+        if self.labels is None:
+            return np.full(hi - lo, None, dtype=object)
+        return np.asarray(self.label_values, dtype=object)[self.labels[lo:hi]]
+
+
 # ==========================================
-# 1) CSV yükleme ve cache
+# 1) CSV -> .npy cache
 # ==========================================
 
-_df_cache: Optional[pd.DataFrame] = None
+def _cache_dir_for(csv_path: Path) -> Path:
+    # CSV yolu + boyut + mtime (+ format sürümü) => CSV değişince yeni cache
+    st = csv_path.stat()
+    key = f"{csv_path.resolve()}:{st.st_size}:{st.st_mtime_ns}:v{_CACHE_VERSION}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return DATA_CACHE_DIR / f"{csv_path.stem}-{digest}"
+
+
+def _count_rows(csv_path: Path) -> int:
+    # Üst sınır: read_csv boş satırları atlar, tırnaklı alanlar birden çok satır
+    # sürebilir; gerçek satır sayısı dönüşüm sonunda meta["rows"]'a yazılır.
+    with csv_path.open("rb") as f:
+        n = sum(1 for _ in f)
+    return max(n - 1, 0)  # header
 
 
-def load_dataframe() -> pd.DataFrame:
+def build_capture_cache(csv_path: Path) -> Path:
     """
-    CSV'yi tek seferlik okur ve hafızada tutar.
-    START_ROW / END_ROW slice'ını burada uygular.
+    CSV'yi chunk chunk okuyup cache klasörüne yazar (yoksa). Hafıza kullanımı
+    CSV boyutundan bağımsızdır. Cache klasörünün yolunu döner.
     """
-    global _df_cache
-    if _df_cache is not None:
-        return _df_cache
+    cache_dir = _cache_dir_for(csv_path)
+    if (cache_dir / "meta.json").exists():
+        return cache_dir
 
-    if not CSV_PATH.exists():
-        raise FileNotFoundError(f"CSV dosyası bulunamadı: {CSV_PATH}")
+    print(f"[Replay] Building mmap cache for {csv_path.name} -> {cache_dir}")
+    feature_cols = infer_feature_cols_from_csv(csv_path, LABEL_COL)
+    n_rows = _count_rows(csv_path)
 
-    print(f"[Replay] Loading CSV: {CSV_PATH}")
-    df = pd.read_csv(CSV_PATH)
+    tmp_dir = cache_dir.with_name(cache_dir.name + f".tmp{os.getpid()}")
+    tmp_dir.mkdir(parents=True, exist_ok=True)
 
-    # Etiket kolonunu replay sırasında kullanmıyoruz,
-    # ama istersen ileride görmek için bırakmak da mümkün.
-    # Şimdilik dataframe'de dursun; row_dict içinde de yer alacak.
-    # Eğer hiç görmek istemezsen burada drop edebilirsin:
-    # if LABEL_COL in df.columns:
-    #     df = df.drop(columns=[LABEL_COL])
+    features = np.lib.format.open_memmap(
+        tmp_dir / "features.npy", mode="w+", dtype=np.float32, shape=(n_rows, len(feature_cols))
+    )
+    has_ts = TIMESTAMP_COL is not None
+    ts_out = (
+        np.lib.format.open_memmap(tmp_dir / "timestamps.npy", mode="w+", dtype=np.int64, shape=(n_rows,))
+        if has_ts else None
+    )
+    labels_out = None
+    label_codes: dict = {}      # orijinal değer -> kod
+    label_values: list = []     # kod -> orijinal değer
+
+    pos = 0
+    for chunk in pd.read_csv(csv_path, chunksize=_CONVERT_CHUNK_ROWS):
+        n = len(chunk)
+        features[pos:pos + n] = chunk[feature_cols].to_numpy(dtype=np.float32)
+
+        if has_ts and TIMESTAMP_COL in chunk.columns:
+            ts = pd.to_datetime(chunk[TIMESTAMP_COL], errors="coerce")
+            ts_out[pos:pos + n] = ts.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        elif has_ts:
+            has_ts = False
+
+        if LABEL_COL in chunk.columns:
+            if labels_out is None:
+                labels_out = np.lib.format.open_memmap(
+                    tmp_dir / "labels.npy", mode="w+", dtype=np.int16, shape=(n_rows,)
+                )
+            # Boş label'lar da kendi kodunu alır (sentinel -1 son koda denk gelirdi)
+            codes, uniques = pd.factorize(chunk[LABEL_COL], use_na_sentinel=False)
+            keys = [None if pd.isna(v) else v for v in uniques]
+            for v in keys:
+                if v not in label_codes:
+                    label_codes[v] = len(label_values)
+                    # JSON'a yazılabilsin diye numpy skalerleri Python tipine çevrilir
+                    label_values.append(v.item() if hasattr(v, "item") else v)
+            remap = np.array([label_codes[v] for v in keys], dtype=np.int16)
+            labels_out[pos:pos + n] = remap[codes]
+
+        pos += n
+
+    if pos > n_rows:
+        raise ValueError(f"[Replay] {csv_path.name}: {pos} satır okundu, {n_rows} bekleniyordu.")
+
+    features.flush()
+    del features
+    if ts_out is not None:
+        ts_out.flush()
+        del ts_out
+        if not has_ts:
+            (tmp_dir / "timestamps.npy").unlink()
+    if labels_out is not None:
+        labels_out.flush()
+        del labels_out
+
+    meta = {
+        "csv": str(csv_path.resolve()),
+        # Dosyalar n_rows'a göre ayrıldı; sondaki kullanılmayan satırlar okunmaz
+        "rows": pos,
+        "feature_cols": feature_cols,
+        "has_timestamps": has_ts,
+        "label_values": label_values,
+    }
+    with (tmp_dir / "meta.json").open("w") as f:
+        json.dump(meta, f)
+
+    try:
+        tmp_dir.rename(cache_dir)
+    except OSError:
+        # Başka bir process aynı anda üretmiş olabilir; onunkini kullan
+        if not (cache_dir / "meta.json").exists():
+            raise
+    return cache_dir
 
-    # START_ROW / END_ROW aralığını uygula
-    start = START_ROW or 0
-    end = END_ROW  # None olabilir, zaten iloc'ta sorun yok
 
-    df = df.iloc[start:end].reset_index(drop=True)
+# ==========================================
+# 2) Cache'i aç
+# ==========================================
+
+def load_capture(csv_path: Path) -> MappedCapture:
+    """
+    CSV'nin mmap cache'ini (gerekirse üretip) açar ve START_ROW / END_ROW uygular.
+    """
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV dosyası bulunamadı: {csv_path}")
+
+    cache_dir = build_capture_cache(csv_path)
+    with (cache_dir / "meta.json").open("r") as f:
+        meta = json.load(f)
 
-    _df_cache = df
-    print(f"[Replay] DataFrame shape after slicing: {df.shape}")
-    return _df_cache
+    print(f"[Replay] Mapping {csv_path.name} from {cache_dir}")
+
+    # START_ROW / END_ROW aralığını uygula
+    n_rows = meta["rows"]
+    start = START_ROW or 0
+    end = n_rows if END_ROW is None else min(END_ROW, n_rows)
+    rows = slice(start, end)
+
+    mapped_files = [cache_dir / "features.npy"]
+    features = np.load(mapped_files[0], mmap_mode="r")[rows]
+
+    raw_ts = None
+    if meta["has_timestamps"]:
+        mapped_files.append(cache_dir / "timestamps.npy")
+        raw_ts = np.load(mapped_files[-1], mmap_mode="r")[rows]
+
+    labels = None
+    if (cache_dir / "labels.npy").exists():
+        mapped_files.append(cache_dir / "labels.npy")
+        labels = np.load(mapped_files[-1], mmap_mode="r")[rows]
+
+    timestamps = build_timestamps(len(features), raw_ts)
+    print(f"[Replay] Capture shape after slicing: {features.shape}")
+
+    return MappedCapture(
+        csv_path=csv_path,
+        cache_dir=cache_dir,
+        feature_cols=meta["feature_cols"],
+        features=features,
+        timestamps=timestamps,
+        labels=labels,
+        label_values=meta["label_values"],
+        mapped_files=mapped_files,
+    )
 
 
 # ==========================================
-# 2) Timestamp üretimi
+# 3) Timestamp üretimi
 # ==========================================
 
-def build_timestamps(df: pd.DataFrame) -> pd.Series:
+def build_timestamps(n: int, raw_ts: Optional[np.ndarray]) -> pd.DatetimeIndex:
     """
-    DataFrame uzunluğuna göre timestamp serisi üretir.
+    n satır için timestamp serisi üretir.
 
     - TIMESTAMP_COL tanımlı ve USE_SYNTHETIC_TIME = False ise:
-        => df[TIMESTAMP_COL] pandas.to_datetime ile parse edilir.
+        => cache'teki parse edilmiş timestamp'ler (int64 ns) kullanılır.
     - Aksi halde:
         => START_DATETIME'dan başlayıp STEP_SECONDS aralıklı
            sentetik zaman serisi üretilir.
     """
-    n = len(df)
     if n == 0:
-        raise ValueError("[Replay] DataFrame boş, replay yapacak satır yok.")
+        raise ValueError("[Replay] Capture boş, replay yapacak satır yok.")
 
     # Gerçek timestamp kolonu kullanılacak mı?
     if (TIMESTAMP_COL is not None) and (not USE_SYNTHETIC_TIME):
-        if TIMESTAMP_COL not in df.columns:
+        if raw_ts is None:
             raise KeyError(
-                f"[Replay] TIMESTAMP_COL='{TIMESTAMP_COL}' DataFrame kolonları içinde yok."
+                f"[Replay] TIMESTAMP_COL='{TIMESTAMP_COL}' CSV kolonları içinde yok."
             )
 
-        ts = pd.to_datetime(df[TIMESTAMP_COL], errors="coerce")
+        ts = pd.DatetimeIndex(np.asarray(raw_ts).view("datetime64[ns]"))
 
         if ts.isna().any():
             # Eğer parse edilemeyen değerler varsa uyaralım,
@@ -119,33 +302,38 @@ def build_timestamps(df: pd.DataFrame) -> pd.Series:
         f"step={STEP_SECONDS}s"
     )
 
-    start_dt: datetime = START_DATETIME
-    delta = timedelta(seconds=STEP_SECONDS)
-    times = [start_dt + i * delta for i in range(n)]
-    return pd.Series(times)
+    return pd.DatetimeIndex(
+        pd.Timestamp(START_DATETIME) + np.arange(n) * pd.Timedelta(timedelta(seconds=STEP_SECONDS))
+    )
 
 
 # ==========================================
-# 3) Ana iterator
+# 4) Chunk iterator
 # ==========================================
 
-def iter_replay_rows() -> Iterator[Tuple[int, Dict, datetime]]:
+def iter_replay_chunks(
+    capture: MappedCapture,
+    start: int = 0,
+    end: Optional[int] = None,
+    first_chunk: int = 64,
+    max_chunk: int = 2048,
+) -> Iterator[Tuple[int, int]]:
     """
-    Replay sırasında kullanılacak ana iterator.
+    [start, end) satır aralığını chunk'lar halinde dolaşır.
+    Chunk boyu first_chunk'tan başlayıp her adımda ikiye katlanır (max_chunk'a kadar);
+    böylece ilk chunk hızlı hazır olur, sonrakiler daha verimli işlenir.
 
     Yields:
-        index: int
-            0'dan başlayan satır index'i (slice sonrası)
-        row_dict: dict
-            satırın sözlük hali (kolon adı -> değer)
-        ts: datetime
-            satır için logical timestamp (gerçek veya sentetik)
+        lo, hi: int
+            chunk'ın [lo, hi) satır aralığı
     """
-    df = load_dataframe()
-    ts_series = build_timestamps(df)
-
-    for i, (_, row) in enumerate(df.iterrows()):
-        row_dict = row.to_dict()
-        ts: datetime = ts_series.iloc[i].to_pydatetime()  # type: ignore
-
-        yield i, row_dict, ts
+    n = len(capture)
+    end = n if end is None else min(end, n)
+    lo = max(start, 0)
+    size = max(first_chunk, 1)
+
+    while lo < end:
+        hi = min(lo + size, end)
+        yield lo, hi
+        lo = hi
+        size = min(size * 2, max_chunk)
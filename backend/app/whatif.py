@@ -0,0 +1,180 @@
+"""
+What-if (pertürbasyon) modülü
+
+Bu modülün görevi:
+- Control sayfasından gelen senaryoları (offset / ramp / stuck) tek bir
+  pencereye vektörize şekilde uygulamak
+- Baseline + tüm senaryo varyantlarını tek batch'lik VAELSTMv2 forward
+  pass'inde skorlamak
+
+Zaman adımları pencere içi index'tir (0 = en eski, WINDOW_SIZE-1 = en yeni);
+negatif değerler Python slice'ları gibi sondan sayılır. [start, end) aralığı.
+start verilmezse aralık pencerenin son WHATIF_DEFAULT_SPAN adımıdır
+(end verilmezse pencerenin sonu).
+
+Model pencereyi sensör başına kendi ortalaması / std'si ile normalize eder
+(APPLY_WINDOW_NORM). Bu yüzden tüm pencereyi kapsayan bir offset ortalamaya
+karışıp tamamen sadeleşir ve delta_score 0 çıkar; böyle bir istek reddedilir
+(ValueError). Sabit bir kaymanın etkisini görmek için offset'i pencerenin bir
+kısmına (örn. son adımlara) uygula ya da ramp kullan.
+
+Pertürbasyon türleri:
+- offset: aralık boyunca value eklenir
+- ramp  : aralık boyunca 0'dan value'ya doğrusal artan ek
+- stuck : aralık boyunca sensör value'da sabit kalır
+          (value verilmezse aralığın ilk adımındaki değerde donar)
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .config import (
+    ANOMALY_THRESHOLD,
+    APPLY_WINDOW_NORM,
+    WHATIF_DEFAULT_SPAN,
+    WHATIF_MAX_SCENARIOS,
+)
+
+
+class Perturbation(BaseModel):
+    sensor: str
+    kind: Literal["offset", "ramp", "stuck"]
+    value: Optional[float] = None
+    # None => son WHATIF_DEFAULT_SPAN adım
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+
+class Scenario(BaseModel):
+    name: Optional[str] = None
+    perturbations: List[Perturbation] = Field(default_factory=list)
+
+
+class WhatIfRequest(BaseModel):
+    # None => modelin o anki canlı penceresi
+    index: Optional[int] = None
+    scenarios: List[Scenario] = Field(..., max_length=WHATIF_MAX_SCENARIOS)
+
+
+def _resolve_range(start: Optional[int], end: Optional[int], seq_len: int) -> tuple[int, int]:
+    if start is None:
+        start = seq_len - min(WHATIF_DEFAULT_SPAN, seq_len)
+    elif start < 0:
+        start += seq_len
+    if end is None:
+        end = seq_len
+    elif end < 0:
+        end += seq_len
+    return max(0, min(start, seq_len)), max(0, min(end, seq_len))
+
+
+def apply_perturbations(
+    window: np.ndarray,
+    scenarios: List[Scenario],
+    feature_cols: List[str],
+) -> np.ndarray:
+    """
+    (seq_len, feat) pencereden (1 + len(scenarios), seq_len, feat) batch üretir.
+    batch[0] baseline'dır (dokunulmamış kopya).
+
+    Bilinmeyen sensör adı KeyError, tüm pencereyi kapsayan offset
+    (window norm açıkken etkisiz) ValueError fırlatır.
+    """
+    seq_len, _ = window.shape
+    col_index = {c: i for i, c in enumerate(feature_cols)}
+
+    unknown = sorted(
+        {p.sensor for sc in scenarios for p in sc.perturbations} - col_index.keys()
+    )
+    if unknown:
+        raise KeyError(", ".join(unknown))
+
+    batch = np.repeat(window[None].astype(np.float32), len(scenarios) + 1, axis=0)
+
+    # Tüm pertürbasyonları düz dizilere topla (senaryo index'i 1'den başlar)
+    rows = [
+        (s_i + 1, col_index[p.sensor], p)
+        for s_i, scenario in enumerate(scenarios)
+        for p in scenario.perturbations
+    ]
+    if not rows:
+        return batch
+
+    scen = np.array([r[0] for r in rows], dtype=np.intp)
+    feat = np.array([r[1] for r in rows], dtype=np.intp)
+    bounds = np.array(
+        [_resolve_range(r[2].start, r[2].end, seq_len) for r in rows], dtype=np.intp
+    )
+    t0, t1 = bounds[:, 0:1], bounds[:, 1:2]                   # (P, 1)
+    kind = np.array([r[2].kind for r in rows])
+
+    if APPLY_WINDOW_NORM:
+        full = (kind == "offset") & (t0[:, 0] == 0) & (t1[:, 0] == seq_len)
+        if full.any():
+            names = sorted({rows[i][2].sensor for i in np.nonzero(full)[0]})
+            raise ValueError(
+                f"Tüm pencereyi kapsayan offset window norm'da sadeleşir ({', '.join(names)}); "
+                f"start/end ile pencerenin bir kısmını seç."
+            )
+    value = np.array(
+        [np.nan if r[2].value is None else r[2].value for r in rows], dtype=np.float32
+    )[:, None]                                                  # (P, 1)
+
+    t = np.arange(seq_len)[None, :]                             # (1, seq_len)
+    mask = (t >= t0) & (t < t1)                                 # (P, seq_len)
+
+    # offset / ramp: toplanabilir ek (aynı hücreye düşenler np.add.at ile birikir)
+    span = np.maximum(t1 - t0, 1)
+    ramp = np.clip((t - t0 + 1) / span, 0.0, 1.0)
+    additive = np.where(kind[:, None] == "ramp", ramp, 1.0) * np.nan_to_num(value)
+    additive = np.where(mask & (kind[:, None] != "stuck"), additive, 0.0)
+    np.add.at(batch, (scen[:, None], t, feat[:, None]), additive.astype(np.float32))
+
+    # stuck: aralık içinde sabit değere ata (toplanabilir eklerden sonra)
+    stuck = kind == "stuck"
+    if stuck.any():
+        s_scen, s_feat, s_t0 = scen[stuck], feat[stuck], np.minimum(t0[stuck, 0], seq_len - 1)
+        s_value = value[stuck, 0]
+        frozen = batch[s_scen, s_t0, s_feat]
+        s_value = np.where(np.isnan(s_value), frozen, s_value)
+
+        p_i, t_i = np.nonzero(mask[stuck])
+        batch[s_scen[p_i], t_i, s_feat[p_i]] = s_value[p_i]
+
+    return batch
+
+
+def run_whatif(model, window: np.ndarray, scenarios: List[Scenario]) -> Dict:
+    """
+    Baseline + senaryoları tek batch'te skorlar.
+    Latent örnekleme yerine mu kullanılır ki farklar gürültüden değil
+    pertürbasyondan gelsin.
+    """
+    batch = apply_perturbations(window, scenarios, model.feature_cols)
+    scores, per_feat_mse = model.score_windows(batch, deterministic=True)
+
+    baseline_score = float(scores[0])
+
+    def describe(i: int, name: str) -> Dict:
+        diag = model.feature_diagnostics(per_feat_mse[i])
+        score = float(scores[i])
+        return {
+            "name": name,
+            "anomaly_score": score,
+            "is_attack": score > ANOMALY_THRESHOLD,
+            "delta_score": score - baseline_score,
+            "per_feature_flag": diag["per_feature_flag"],
+            "per_feature_z": diag["per_feature_z"],
+        }
+
+    return {
+        "baseline": describe(0, "baseline"),
+        "scenarios": [
+            describe(i + 1, sc.name or f"scenario_{i + 1}")
+            for i, sc in enumerate(scenarios)
+        ],
+    }
@@ -0,0 +1,188 @@
+"""
+Pencere (window) pipeline modülü
+
+Bu modülün görevi:
+- Capture'ın tüm feature matrisini global scaler ile BİR KEZ float32'ye
+  ölçeklemek (sonuç capture cache klasöründe memory-mapped .npy olarak saklanır)
+- Ölçeklenmiş matris üzerinde sliding_window_view ile her pencereyi kopyasız,
+  strided bir view olarak sunmak
+- Per-window z-score normalizasyonunu bir batch'in tamamına tek seferde,
+  önceden ayrılmış (WindowWorkspace) buffer'lara yazarak uygulamak
+
+Çıkan (batch, seq_len, feat) float32 dizi C-contiguous'tur; model tarafında
+torch.from_numpy ile kopyasız tensöre çevrilir.
+
+Canlı akış her tick'te aynı workspace'i kullanır; böylece tick başına büyük
+dizi ayrılmaz (bkz. tools/allocprofile.py). Workspace'ten dönen diziler bir
+sonraki çağrıda üzerine yazılır; sonucu tutmak isteyen kopyalamalıdır.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .config import APPLY_WINDOW_NORM, WINDOW_NORM_EPS, START_ROW, END_ROW
+
+
+# Ölçekleme sırasında tek seferde işlenen satır sayısı
+_SCALE_CHUNK_ROWS = 100_000
+
+
+class WindowWorkspace:
+    """
+    Normalizasyon için tekrar kullanılan buffer'lar. Kapasite gerektiğinde
+    büyür (asla küçülmez); aynı boyuttaki batch'ler yeni bellek ayırmaz.
+    """
+
+    def __init__(self, seq_len: int, n_feat: int, capacity: int = 1):
+        self.seq_len = seq_len
+        self.n_feat = n_feat
+        self._alloc(capacity)
+
+    def _alloc(self, capacity: int):
+        self.capacity = capacity
+        self.out = np.empty((capacity, self.seq_len, self.n_feat), dtype=np.float32)
+        self.mean = np.empty((capacity, 1, self.n_feat), dtype=np.float32)
+        self.std = np.empty((capacity, self.n_feat), dtype=np.float32)
+
+    def get(self, batch: int):
+        if batch > self.capacity:
+            self._alloc(max(batch, 2 * self.capacity))
+        return self.out[:batch], self.mean[:batch], self.std[:batch]
+
+
+def normalize_windows_into(windows: np.ndarray, ws: WindowWorkspace) -> np.ndarray:
+    """
+    (batch, seq_len, feat) pencerelere per-window z-score uygular
+    (zaman ekseni boyunca, ddof=1; WindowDataset.apply_window_norm=True ile aynı).
+
+    windows herhangi bir strided view olabilir; sonuç ws.out içine yazılır.
+    windows zaten ws.out'un kendisiyse yerinde çalışır.
+    """
+    batch, seq_len, _ = windows.shape
+    out, mean, std = ws.get(batch)
+
+    if not APPLY_WINDOW_NORM:
+        np.copyto(out, windows)
+        return out
+
+    np.mean(windows, axis=1, keepdims=True, out=mean)               # (batch, 1, feat)
+    np.subtract(windows, mean, out=out)
+    np.einsum("bwf,bwf->bf", out, out, out=std)                     # kare toplamı
+    std /= seq_len - 1
+    np.sqrt(std, out=std)
+    std += WINDOW_NORM_EPS
+    np.divide(out, std[:, None, :], out=out)
+    return out
+
+
+class WindowPipeline:
+    """
+    features: (N, feat) float32 capture matrisi (memmap olabilir)
+    scaler:   fit edilmiş StandardScaler ya da None
+    cache_dir: verilirse ölçeklenmiş matris buraya .npy olarak yazılıp mmap ile açılır
+    """
+
+    def __init__(
+        self,
+        features: np.ndarray,
+        scaler,
+        window_size: int,
+        cache_dir: Optional[Path] = None,
+    ):
+        self.features = features
+        self.scaler = scaler
+        self.window_size = window_size
+        self.n_feat = features.shape[1]
+
+        # Ölçeklenmiş matris cache'ten mmap ile açıldıysa dosya yolu, yoksa None
+        self.scaled_path: Optional[Path] = None
+        self.scaled = self._build_scaled(cache_dir)                 # (N, feat) float32
+        # views[s] = scaled[s:s+window_size]; hiçbiri kopya değil
+        self.views = sliding_window_view(self.scaled, window_size, axis=0).transpose(0, 2, 1)
+
+    def __len__(self) -> int:
+        return self.scaled.shape[0]
+
+    # ----------------- ölçekleme (bir kez) -------------------
+
+    def _scaler_key(self) -> str:
+        # Scaler parametreleri + START_ROW / END_ROW dilimi (features tüm capture olmayabilir)
+        h = hashlib.sha1(f"{START_ROW}:{END_ROW}".encode())
+        for attr in ("mean_", "scale_"):
+            value = getattr(self.scaler, attr, None)
+            if value is not None:
+                h.update(np.ascontiguousarray(value).tobytes())
+        return h.hexdigest()[:12]
+
+    def _scale_chunks(self, out: np.ndarray):
+        for lo in range(0, len(self.features), _SCALE_CHUNK_ROWS):
+            chunk = np.asarray(self.features[lo:lo + _SCALE_CHUNK_ROWS], dtype=np.float32)
+            out[lo:lo + len(chunk)] = self.scaler.transform(chunk)
+
+    def _build_scaled(self, cache_dir: Optional[Path]) -> np.ndarray:
+        if self.scaler is None:
+            return self.features
+
+        shape = self.features.shape
+        if cache_dir is None:
+            scaled = np.empty(shape, dtype=np.float32)
+            self._scale_chunks(scaled)
+            return scaled
+
+        path = cache_dir / f"scaled-{self._scaler_key()}.npy"
+        if not path.exists():
+            print(f"[Windows] Scaling {shape[0]} rows once -> {path.name}")
+            tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+            scaled = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=shape)
+            self._scale_chunks(scaled)
+            scaled.flush()
+            del scaled
+            os.replace(tmp, path)
+
+        self.scaled_path = path
+        return np.load(path, mmap_mode="r")
+
+    # ----------------- pencere erişimi -----------------------
+
+    def windows_ending(self, lo: int, hi: int) -> np.ndarray:
+        """
+        [lo, hi) satırlarında biten pencereler, (hi - lo, seq_len, feat) strided view.
+        lo >= window_size - 1 olmalı.
+        """
+        w = self.window_size
+        return self.views[lo - w + 1:hi - w + 1]
+
+    def normalized_range(self, lo: int, hi: int, ws: WindowWorkspace) -> np.ndarray:
+        """[lo, hi) satırlarında biten pencerelerin normalize edilmiş batch'i (ws içinde)."""
+        return normalize_windows_into(self.windows_ending(lo, hi), ws)
+
+    def normalized_rows(self, rows: np.ndarray, ws: WindowWorkspace) -> np.ndarray:
+        """
+        Sırası verilen (seq_len,) satır index'lerinden tek pencere (1, seq_len, feat).
+        Canlı akışta ziyaret sırası geri / jump sonrası ardışık olmayabilir.
+        """
+        out, _, _ = ws.get(1)
+        np.take(self.scaled, rows, axis=0, out=out[0], mode="clip")
+        return normalize_windows_into(out, ws)
+
+    def normalized_raw(self, windows: np.ndarray, ws: WindowWorkspace) -> np.ndarray:
+        """
+        Ölçeklenmemiş (batch, seq_len, feat) pencereler (örn. what-if varyantları):
+        scaler + per-window z-score.
+        """
+        batch, seq_len, n_feat = windows.shape
+        out, _, _ = ws.get(batch)
+        if self.scaler is None:
+            np.copyto(out, windows)
+        else:
+            out.reshape(-1, n_feat)[:] = self.scaler.transform(
+                windows.reshape(-1, n_feat).astype(np.float32, copy=False)
+            )
+        return normalize_windows_into(out, ws)
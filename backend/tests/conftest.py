@@ -0,0 +1,46 @@
+"""
+Testler sentetik bir capture + rastgele ağırlıklı model ile çalışır
+(tools.loadtest ile aynı üreticiler). app.config env'i import anında okuduğu
+için env burada, app import edilmeden önce ayarlanır.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+_workdir = Path(tempfile.mkdtemp(prefix="swat-tests-"))
+os.environ["SWAT_CSV_PATH"] = str(_workdir / "synthetic.csv")
+os.environ["SWAT_MODEL_PATH"] = str(_workdir / "random_weights.pt")
+os.environ["SWAT_DATASETS_FILE"] = str(_workdir / "datasets.json")
+os.environ["SWAT_CACHE_DIR"] = str(_workdir / "cache")
+
+import pytest
+
+from tools.loadtest import make_random_model, make_synthetic_dataset
+
+_feature_cols = make_synthetic_dataset(Path(os.environ["SWAT_CSV_PATH"]), 600, seed=0)
+make_random_model(Path(os.environ["SWAT_MODEL_PATH"]), len(_feature_cols), seed=0)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def dataset(client):
+    from app.datasets import get_dataset
+
+    ds = get_dataset()
+    ds.state.speed = 1000.0
+    ds.state.playing = True
+    ds.state.direction = 1
+    return ds
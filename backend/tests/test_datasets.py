@@ -0,0 +1,17 @@
+import numpy as np
+
+
+def test_memory_report_counts_only_mapped_files(client, dataset):
+    before = dataset.memory_report()["mapped_bytes"]
+
+    # Eski bir scaler'dan kalmış, artık map'lenmeyen cache dosyası
+    stale = dataset.capture.cache_dir / "scaled-000000000000.npy"
+    np.save(stale, np.zeros((1000, 10), dtype=np.float32))
+    try:
+        assert dataset.memory_report()["mapped_bytes"] == before
+    finally:
+        stale.unlink()
+
+    opened = {p.name for p in dataset.capture.mapped_files}
+    assert {"features.npy", "timestamps.npy", "labels.npy"} <= opened
+    assert dataset.pipeline.scaled_path.exists()
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from app.config import ATTACK_LABEL
+from app.events import LabelSegmentTracker
+
+
+T0 = datetime(2015, 12, 22, 16, 0, 0)
+
+
+def test_label_segments(client, dataset, monkeypatch):
+    tracker = LabelSegmentTracker()
+    labels = ["normal"] * 5 + [ATTACK_LABEL] * 4 + [None, "normal"]
+    deltas = []
+    for i, label in enumerate(labels):
+        prediction = {"anomaly_score": float(i), "per_feature_z": {"a": float(i)}} if i > 6 else None
+        deltas += tracker.update(i, T0 + timedelta(seconds=i), label, prediction)
+
+    assert [(d["action"], d["episode"]["source"]) for d in deltas] == [("start", "label"), ("end", "label")]
+    ep = deltas[-1]["episode"]
+    assert (ep["start_index"], ep["end_index"], ep["frames"]) == (5, 8, 4)
+    assert (ep["peak_score"], ep["peak_index"]) == (8.0, 8)
+
+    # /events label izini ayrıca servis eder
+    monkeypatch.setattr(dataset, "label_segments", tracker)
+    body = client.get("/events", params={"source": "label"}).json()
+    assert [(e["source"], e["start_index"]) for e in body["episodes"]] == [("label", 5)]
+    assert client.get("/events", params={"source": "bogus"}).status_code == 400
@@ -0,0 +1,54 @@
+import json
+from datetime import timedelta, timezone
+
+
+def test_export_converts_offset_times(client, dataset):
+    t0 = dataset.timestamps[200].to_pydatetime()
+    t1 = dataset.timestamps[210].to_pydatetime()
+    tz = timezone(timedelta(hours=3))
+    # Aynı anlar, +03:00 offset'iyle
+    params = {
+        "start_time": (t0 + timedelta(hours=3)).replace(tzinfo=tz).isoformat(),
+        "end_time": (t1 + timedelta(hours=3)).replace(tzinfo=tz).isoformat(),
+    }
+
+    resp = client.get("/export", params=params)
+    assert resp.status_code == 200
+    assert resp.headers["X-Export-Rows"] == "10"
+    rows = [json.loads(line) for line in resp.text.splitlines() if line]
+    assert [r["index"] for r in rows] == list(range(200, 210))
+
+
+def test_arrow_export_with_unlabelled_first_chunk(client, dataset, monkeypatch):
+    import warnings
+
+    import numpy as np
+    import pyarrow as pa
+
+    from app.config import EXPORT_FIRST_CHUNK
+
+    capture = dataset.capture
+    labels_slice = capture.labels_slice
+
+    # İlk chunk'ta hiç label yok (label kolonu tamamen boş)
+    def patched(lo, hi):
+        out = labels_slice(lo, hi)
+        if lo < EXPORT_FIRST_CHUNK:
+            out = np.full(hi - lo, None, dtype=object)
+        return out
+
+    monkeypatch.setattr(capture, "labels_slice", patched)
+
+    params = {"format": "arrow", "end": 300, "include_sensors": True, "include_z": True}
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", category=Warning)
+        resp = client.get("/export", params=params)
+    assert resp.status_code == 200
+
+    table = pa.ipc.open_stream(resp.content).read_all()
+    assert table.num_rows == 300
+    assert table.schema.field("label").type == pa.string()
+    labels = table.column("label").to_pylist()
+    assert labels[:EXPORT_FIRST_CHUNK] == [None] * EXPORT_FIRST_CHUNK
+    assert set(labels[EXPORT_FIRST_CHUNK:]) <= {"normal", "attack"}
+    assert set(capture.feature_cols) <= set(table.column_names)
@@ -0,0 +1,24 @@
+from app.replay import load_capture
+
+
+CSV = (
+    "timestamp,note,a,b,label\n"
+    "2015-12-22 16:00:00,x,1.0,2.0,0\n"
+    "\n"
+    '2015-12-22 16:00:01,"iki\nsatır",3.0,4.0,\n'
+    "2015-12-22 16:00:02,y,5.0,6.0,1\n"
+    "\n"
+)
+
+
+def test_capture_row_count_and_missing_labels(tmp_path):
+    path = tmp_path / "capture.csv"
+    path.write_text(CSV)
+
+    capture = load_capture(path)
+
+    assert len(capture) == 3
+    assert capture.features.tolist() == [[1.0, 2.0], [3.0, 4.0], [5.0, 6.0]]
+    assert capture.timestamps[-1].year == 2015
+    assert [capture.label_at(i) for i in range(3)] == [0, None, 1]
+    assert capture.labels_slice(0, 3).tolist() == [0, None, 1]
@@ -0,0 +1,104 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.config import ANOMALY_THRESHOLD, EPISODE_ENTER_FRAMES, EPISODE_EXIT_FRAMES, WINDOW_SIZE
+
+
+T0 = datetime(2015, 12, 22, 16, 0, 0)
+
+
+def _feed(detector, lo, hi, score):
+    for i in range(lo, hi):
+        detector.update(i, T0 + timedelta(seconds=i), {"anomaly_score": score, "per_feature_z": {}})
+
+
+def _recv_until(ws, pred, limit=2000):
+    for _ in range(limit):
+        msg = ws.receive_json()
+        if pred(msg):
+            return msg
+    raise AssertionError("beklenen mesaj gelmedi")
+
+
+def test_reconnect_keeps_episode_history(client, dataset):
+    episodes = dataset.episodes
+    high, low = ANOMALY_THRESHOLD * 10, 0.0
+
+    # Önceki oturum: iki kapanmış episode + açık bir episode, dolu model penceresi
+    _feed(episodes, 100, 200, high)
+    _feed(episodes, 200, 200 + EPISODE_EXIT_FRAMES, low)
+    _feed(episodes, 300, 400, high)
+    _feed(episodes, 400, 400 + EPISODE_EXIT_FRAMES, low)
+    _feed(episodes, 500, 550, high)
+    assert episodes.current is not None
+    for i in range(200, 200 + WINDOW_SIZE):
+        dataset.model.update_window(i)
+
+    with client.websocket_connect("/ws/stream") as ws:
+        # Açık episode yeniden bağlanmada kapatılır
+        end = _recv_until(ws, lambda m: m.get("type") == "episode" and m["episode"]["source"] == "model")
+        assert end["action"] == "end"
+        assert end["episode"]["start_index"] == 500
+        # Pencere sıfırlandığı için ilk frame'lerde tahmin yok
+        frame = _recv_until(ws, lambda m: m.get("index") == 5)
+        assert frame["prediction"] is None
+
+    ranges = [(e["start_index"], e["end_index"]) for e in client.get("/events").json()["episodes"]]
+    assert ranges[:3] == [(100, 199), (300, 399), (500, 549)]
+
+
+def test_clients_share_one_producer(client, dataset):
+    # Rastgele ağırlıklı modelin skorları eşiğin üstünde: pencere dolunca episode açılır
+    is_start = lambda m: (
+        m.get("type") == "episode" and m["action"] == "start" and m["episode"]["source"] == "model"
+    )
+
+    with client.websocket_connect("/ws/stream") as ws1, \
+            client.websocket_connect("/ws/stream") as ws2:
+        start1 = _recv_until(ws1, is_start)
+        start2 = _recv_until(ws2, is_start)
+
+    assert start1 == start2
+    ep = start1["episode"]
+    # Detektör her satırı bir kez görür
+    assert ep["frames"] == EPISODE_ENTER_FRAMES
+    assert ep["end_index"] - ep["start_index"] + 1 == EPISODE_ENTER_FRAMES
+
+
+
+def _wait_for(pred, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not pred() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return pred()
+
+
+def test_disconnect_while_paused_stops_producer(client, dataset):
+    # TestClient disconnect'te handler'ı kendisi iptal eder; gerçek sunucu gerekir
+    import uvicorn
+    from websockets.sync.client import connect
+
+    from app import main
+    from tools.loadtest import _free_port
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        assert _wait_for(lambda: server.started)
+        dataset.state.playing = False
+        # Bağlanınca hiçbir mesaj gitmesin (açık episode kapanışı da)
+        dataset.episodes.interrupt()
+        dataset.label_segments.interrupt()
+
+        with connect(f"ws://127.0.0.1:{port}/ws/stream"):
+            assert _wait_for(lambda: dataset.name in main._producers)
+
+        # Pause'da hiç frame gitmiyor; disconnect yine de fark edilmeli
+        assert _wait_for(lambda: dataset.name not in main._producers)
+        assert not main._subscribers[dataset.name]
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
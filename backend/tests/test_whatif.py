@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from app.config import WHATIF_DEFAULT_SPAN, WINDOW_SIZE
+from app.whatif import Perturbation, Scenario, apply_perturbations
+
+
+COLS = ["a", "b"]
+
+
+def _window():
+    return np.zeros((WINDOW_SIZE, len(COLS)), dtype=np.float32)
+
+
+def test_default_range_is_trailing():
+    sc = Scenario(perturbations=[Perturbation(sensor="a", kind="offset", value=2.0)])
+    batch = apply_perturbations(_window(), [sc], COLS)
+
+    changed = np.nonzero(batch[1, :, 0])[0]
+    assert changed.tolist() == list(range(WINDOW_SIZE - WHATIF_DEFAULT_SPAN, WINDOW_SIZE))
+    assert not batch[1, :, 1].any()
+    assert not batch[0].any()
+
+
+def test_full_window_offset_is_rejected():
+    sc = Scenario(perturbations=[Perturbation(sensor="b", kind="offset", value=1.0, start=0)])
+    with pytest.raises(ValueError, match="b"):
+        apply_perturbations(_window(), [sc], COLS)
+
+
+def test_full_window_offset_endpoint_returns_400(client, dataset):
+    sensor = dataset.feature_cols[0]
+    resp = client.post("/whatif", json={
+        "index": WINDOW_SIZE,
+        "scenarios": [{"perturbations": [
+            {"sensor": sensor, "kind": "offset", "value": 1.0, "start": 0},
+        ]}],
+    })
+    assert resp.status_code == 400
+
+    resp = client.post("/whatif", json={
+        "index": WINDOW_SIZE,
+        "scenarios": [{"perturbations": [{"sensor": sensor, "kind": "offset", "value": 1.0}]}],
+    })
+    assert resp.status_code == 200
+    assert resp.json()["scenarios"][0]["delta_score"] != 0
@@ -0,0 +1,209 @@
+"""
+Canlı tick allocation profili
+
+Bu script'in görevi:
+- Sentetik bir SWaT CSV'si ve rastgele ağırlıklı model üretmek (tools.loadtest ile aynı)
+- Dataset'i (mmap capture + WindowPipeline) process içinde açmak
+- Her canlı tick'i (update_window + predict) tracemalloc altında çalıştırıp
+  tick başına tepe (peak) ek bellek kullanımını ölçmek
+- Karşılaştırma için aynı pencereleri ham yoldan (satırları kopyala, her çağrıda
+  ölçekle, yeni buffer'a normalize et) ve export'taki gibi batch yoldan
+  (sliding_window_view + tekrar kullanılan workspace) skorlamak
+
+numpy, broadcast'li her ufunc çağrısında (örn. pencere - ortalama) iterator için
+np.getbufsize() ile sınırlı sabit bir scratch buffer ayırır; bu veri boyutuyla
+büyümez. Script bunu aynı pencere şekliyle kalibre eder ve tick'in tepe ek
+belleğinden düşer. Kalan fazlalık tek pencere boyutunun (WINDOW_SIZE * feat * 4 byte)
+altındaysa o tick'te pencere büyüklüğünde bir dizi ayrılmamış demektir.
+Canlı yolda böyle bir tick varsa script 1 ile çıkar (CI'da kapı olarak kullanılabilir).
+
+Not: numpy buffer'ları tracemalloc'a görünür; torch'un kendi CPU allocator'ının
+(LSTM ara tensörleri) ayırmaları görünmez, ölçüm input pipeline'ını kapsar.
+
+Kullanım (backend/ klasöründen):
+    python -m tools.allocprofile --ticks 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+
+from tools.loadtest import make_random_model, make_synthetic_dataset
+
+
+def profile_ticks(n_ticks: int, tick: Callable[[int], None], start: int) -> Dict:
+    """
+    tick(i) çağrılarının her biri için tracemalloc tepe ek belleğini (byte) ölçer.
+    """
+    peaks = np.empty(n_ticks, dtype=np.int64)
+    tracemalloc.start()
+    try:
+        for k in range(n_ticks):
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            tick(start + k)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks[k] = peak - base
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ticks": n_ticks,
+        "peak_bytes_p50": int(np.percentile(peaks, 50)),
+        "peak_bytes_p99": int(np.percentile(peaks, 99)),
+        "peak_bytes_max": int(peaks.max()),
+        "_peaks": peaks,
+    }
+
+
+def ufunc_scratch_bytes(seq_len: int, n_feat: int) -> int:
+    """
+    (1, seq_len, feat) pencereden ortalama çıkarmanın (broadcast'li ufunc)
+    numpy iterator scratch'i; veri ayırmaz, sadece bu sabit buffer'ı ölçer.
+    """
+    a = np.zeros((1, seq_len, n_feat), dtype=np.float32)
+    m = np.zeros((1, 1, n_feat), dtype=np.float32)
+    result = profile_ticks(3, lambda _: np.subtract(a, m, out=a), 0)
+    return result["peak_bytes_max"]
+
+
+def summarize(result: Dict, window_bytes: int, scratch_bytes: int) -> Dict:
+    peaks = result.pop("_peaks")
+    result["ticks_with_window_sized_alloc"] = int(
+        (peaks - scratch_bytes >= window_bytes).sum()
+    )
+    return result
+
+
+# ==========================================
+# CLI
+# ==========================================
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="SWaT backend canlı tick allocation profili")
+    p.add_argument("--ticks", type=int, default=500, help="ölçülen tick sayısı")
+    p.add_argument("--batch", type=int, default=32, help="batch yolunda tick başına pencere")
+    p.add_argument("--rows", type=int, default=5_000, help="sentetik CSV satır sayısı")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workdir", type=Path, default=None,
+                   help="sentetik veri / model / cache (varsayılan: geçici klasör)")
+    p.add_argument("--output", type=Path, default=None, help="JSON rapor yolu")
+    return p.parse_args(argv)
+
+
+def print_table(paths: Dict[str, Dict]):
+    header = f"{'path':>6} {'ticks':>6} {'p50KB':>8} {'p99KB':>8} {'maxKB':>8} {'>=window':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in paths.items():
+        print(
+            f"{name:>6} {r['ticks']:>6} {r['peak_bytes_p50'] / 1024:>8.1f} "
+            f"{r['peak_bytes_p99'] / 1024:>8.1f} {r['peak_bytes_max'] / 1024:>8.1f} "
+            f"{r['ticks_with_window_sized_alloc']:>9}"
+        )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    tmp = None
+    if args.workdir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="swat-allocprofile-")
+        workdir = Path(tmp.name)
+    else:
+        workdir = args.workdir
+        workdir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        csv_path = workdir / "synthetic.csv"
+        model_path = workdir / "random_weights.pt"
+
+        # app.config import edilmeden önce (env değerleri import anında okunur;
+        # make_random_model da app.model'i import eder)
+        os.environ["SWAT_CSV_PATH"] = str(csv_path)
+        os.environ["SWAT_MODEL_PATH"] = str(model_path)
+        os.environ["SWAT_DATASETS_FILE"] = str(workdir / "datasets.json")
+        os.environ["SWAT_CACHE_DIR"] = str(workdir / "cache")
+
+        feature_cols = make_synthetic_dataset(csv_path, args.rows, args.seed)
+        make_random_model(model_path, len(feature_cols), args.seed)
+
+        from app.config import WINDOW_SIZE
+        from app.datasets import get_dataset
+        from app.windows import WindowWorkspace
+
+        ds = get_dataset()
+        model = ds.model
+        window_bytes = WINDOW_SIZE * len(ds.feature_cols) * 4
+        scratch_bytes = ufunc_scratch_bytes(WINDOW_SIZE, len(ds.feature_cols))
+        n_ticks = min(args.ticks, ds.N - 2 * WINDOW_SIZE - args.batch)
+
+        # Pencereyi doldur + ilk forward'ların tembel ayırmaları ölçüme girmesin
+        for i in range(WINDOW_SIZE):
+            model.update_window(i)
+        for _ in range(5):
+            model.predict()
+
+        def live_tick(i: int):
+            model.update_window(i)
+            model.predict()
+
+        def raw_tick(i: int):
+            model.score_windows(ds.features[i - WINDOW_SIZE + 1:i + 1][None])
+
+        ws = WindowWorkspace(WINDOW_SIZE, len(ds.feature_cols), capacity=args.batch)
+
+        def batch_tick(i: int):
+            model.score_range(i, i + args.batch, ws, deterministic=True)
+
+        start = WINDOW_SIZE
+        paths = {
+            name: summarize(profile_ticks(n_ticks, tick, start), window_bytes, scratch_bytes)
+            for name, tick in (("live", live_tick), ("raw", raw_tick), ("batch", batch_tick))
+        }
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        "config": {
+            "ticks": n_ticks,
+            "rows": args.rows,
+            "n_features": len(feature_cols),
+            "window_size": WINDOW_SIZE,
+            "window_bytes": window_bytes,
+            "ufunc_scratch_bytes": scratch_bytes,
+            "batch": args.batch,
+            "seed": args.seed,
+        },
+        "paths": paths,
+    }
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("w") as f:
+            json.dump(report, f, indent=2)
+
+    print()
+    print(
+        f"[AllocProfile] Pencere boyutu: {window_bytes / 1024:.1f} KB, "
+        f"numpy ufunc scratch: {scratch_bytes / 1024:.1f} KB"
+    )
+    print_table(paths)
+
+    if paths["live"]["ticks_with_window_sized_alloc"]:
+        print("[AllocProfile] Canlı yolda pencere büyüklüğünde ayırma var!")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
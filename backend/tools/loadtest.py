@@ -0,0 +1,602 @@
+"""
+WebSocket yük testi
+
+Bu script'in görevi:
+- Sentetik bir SWaT CSV'si ve rastgele ağırlıklı bir VAELSTMv2 state_dict'i üretmek
+- FastAPI uygulamasını (uvicorn) bu dosyalarla ayrı bir process olarak başlatmak
+- Her adımda N eşzamanlı /ws/stream client'ı açıp, yanında belirli bir hızda
+  REST kontrol komutları göndermek
+- Frame teslim gecikmesini, replay saatinin kaymasını, p50/p99/p999, kaçan frame'leri,
+  sunucu CPU / RSS kullanımını ve throughput'un doyduğu noktayı ölçmek
+- Sonuçları JSON rapor olarak yazmak (koşular birbiriyle karşılaştırılabilsin)
+
+Gecikme tanımı:
+- Sunucu her frame'e yayınlandığı anın duvar saatini (sent_at, epoch s) yazar.
+  Gecikme = client'ın frame'i aldığı an - sent_at: socket kuyruğunda bekleme +
+  iletim. Yetişemeyen bir client'ın birikmiş kuyruğu (STREAM_QUEUE_MAX frame'e
+  kadar) doğrudan gecikme olarak görünür. Sunucu ve client aynı makinede
+  çalıştığı için iki saat aynıdır.
+- Replay saati: recv_k ≈ anchor + (ts_k - ts_0) / speed. Sunucu döngüsü her
+  frame'deki iş süresini bekleme süresinden düşmediği için üretici bu saatin
+  gerisinde kalır; geri kalma hızı drift_ms_per_s olarak (sadece ölçüm
+  aralığındaki frame'lerden) raporlanır.
+- Doyma, en küçük client sayılı adıma (baseline) göre değerlendirilir: client
+  başı fps oranı, p99 gecikme ve baseline'a göre fazladan drift.
+
+Kullanım (backend/ klasöründen):
+    python -m tools.loadtest --clients 1,2,4,8,16 --duration 15 --speed 20
+
+CPU / RSS ölçümü için psutil gerekir (opsiyonel; yoksa bu alanlar boş kalır).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# app'i import etmeden (torch / sklearn yüklemeden) sensör isimlerini almak için
+SENSOR_STATS_PATH = BACKEND_DIR / "models" / "sensor_error_stats_v05.json"
+
+# Sentetik veride satırlar arası süre (saniye); replay saati bunun üzerinden
+SYNTHETIC_STEP_SECONDS = 1.0
+
+# Yük altında durumu bozmayan (replay saatini değiştirmeyen) komutlar
+CONTROL_COMMANDS = ("status", "speed", "events")
+
+
+# ==========================================
+# 1) Sentetik veri + rastgele model
+# ==========================================
+
+def make_synthetic_dataset(path: Path, n_rows: int, seed: int) -> List[str]:
+    """
+    Gerçek SWaT sensör isimleriyle (sensor_error_stats JSON'undan) sinüs + gürültü
+    bir CSV yazar. Arada birkaç "attack" segmenti vardır.
+    """
+    with SENSOR_STATS_PATH.open("r") as f:
+        feature_cols = list(json.load(f).keys())
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_rows, dtype=np.float64)[:, None]
+    period = rng.uniform(200, 2000, size=len(feature_cols))
+    phase = rng.uniform(0, 2 * np.pi, size=len(feature_cols))
+    scale = rng.uniform(1, 100, size=len(feature_cols))
+    values = scale * (1 + 0.5 * np.sin(2 * np.pi * t / period + phase))
+    values += rng.normal(0, 0.05, size=values.shape) * scale
+
+    label = np.full(n_rows, "normal", dtype=object)
+    for start in rng.integers(0, max(n_rows - 300, 1), size=max(n_rows // 5000, 1)):
+        label[start:start + 300] = "attack"
+        values[start:start + 300] *= rng.uniform(1.5, 3.0)
+
+    start_dt = datetime(2015, 12, 22, 16, 0, 0)
+    timestamps = [
+        (start_dt + timedelta(seconds=i * SYNTHETIC_STEP_SECONDS)).isoformat(sep=" ")
+        for i in range(n_rows)
+    ]
+
+    df = pd.DataFrame(values.astype(np.float32), columns=feature_cols)
+    df.insert(0, "timestamp", timestamps)
+    df["label"] = label
+    df.to_csv(path, index=False)
+    return feature_cols
+
+
+def make_random_model(path: Path, n_features: int, seed: int):
+    """
+    Backend'in beklediği mimaride (app.model.VAELSTMv2) rastgele ağırlıklı state_dict.
+    """
+    import torch
+    from app.model import VAELSTMv2
+
+    torch.manual_seed(seed)
+    model = VAELSTMv2(
+        input_dim=n_features,
+        hidden_dim=128,
+        latent_dim=64,
+        num_layers=2,
+        dropout=0.1,
+    )
+    torch.save(model.state_dict(), path)
+
+
+# ==========================================
+# 2) Sunucu process'i
+# ==========================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _http(method: str, url: str, timeout: float = 10.0) -> Dict:
+    req = urllib.request.Request(url, method=method)
+    with urllib.request.urlopen(req, timeout=timeout) as res:
+        return json.loads(res.read())
+
+
+class ServerProcess:
+    """
+    uvicorn'u ayrı process olarak başlatır; psutil varsa CPU / RSS örnekler.
+    """
+
+    def __init__(self, csv_path: Path, model_path: Path, log_path: Path):
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.ws_url = f"ws://127.0.0.1:{self.port}/ws/stream"
+        self.env = {
+            **os.environ,
+            "SWAT_CSV_PATH": str(csv_path),
+            "SWAT_MODEL_PATH": str(model_path),
+            # Yerel datasets.json varsa devre dışı kalsın; mmap cache workdir'de
+            "SWAT_DATASETS_FILE": str(log_path.parent / "datasets.json"),
+            "SWAT_CACHE_DIR": str(log_path.parent / "cache"),
+        }
+        self.log_path = log_path
+        self.proc: Optional[subprocess.Popen] = None
+        self.samples: List[tuple] = []  # (t, cpu_percent, rss_bytes)
+        self._ps = None
+
+    def start(self, timeout: float = 120.0):
+        self._log = self.log_path.open("a")
+        self.proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1",
+                "--port", str(self.port),
+                "--log-level", "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env=self.env,
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(
+                    f"[LoadTest] Sunucu başlatılamadı (exit={self.proc.returncode}), "
+                    f"log: {self.log_path}"
+                )
+            try:
+                _http("GET", f"{self.base_url}/status", timeout=1.0)
+                break
+            except OSError:
+                time.sleep(0.25)
+        else:
+            self.stop()
+            raise TimeoutError(f"[LoadTest] Sunucu {timeout}s içinde hazır olmadı")
+
+        try:
+            import psutil
+            self._ps = psutil.Process(self.proc.pid)
+            self._ps.cpu_percent(interval=None)  # ilk çağrı referans noktası
+        except ImportError:
+            print("[LoadTest] Uyarı: psutil yok, CPU / RSS ölçülmeyecek.")
+
+    async def sample_forever(self, interval: float = 0.5):
+        if self._ps is None:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.samples.append(
+                    (time.monotonic(), self._ps.cpu_percent(interval=None), self._ps.memory_info().rss)
+                )
+            except Exception:
+                return
+
+    def resources(self, since: float) -> Dict:
+        rows = [s for s in self.samples if s[0] >= since]
+        if not rows:
+            return {"cpu_percent_mean": None, "cpu_percent_max": None, "rss_mb_max": None}
+        cpu = np.array([r[1] for r in rows])
+        rss = np.array([r[2] for r in rows])
+        return {
+            "cpu_percent_mean": float(cpu.mean()),
+            "cpu_percent_max": float(cpu.max()),
+            "rss_mb_max": float(rss.max() / 2**20),
+        }
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        self._log.close()
+
+
+# ==========================================
+# 3) Client'lar
+# ==========================================
+
+class ClientStats:
+    def __init__(self):
+        self.recv: List[float] = []   # monotonic receive time
+        self.lat: List[float] = []    # receive wall time - sunucunun sent_at'i (s)
+        self.ts: List[float] = []     # frame timestamp (epoch s)
+        self.index: List[int] = []
+        self.deltas = 0               # episode delta mesajları
+        self.errors: List[str] = []
+
+
+async def run_client(url: str, stop_at: float, stats: ClientStats):
+    import websockets
+
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            while True:
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    return
+                now = time.monotonic()
+                wall = time.time()
+                msg = json.loads(raw)
+                if "type" in msg:
+                    stats.deltas += 1
+                    continue
+                stats.recv.append(now)
+                sent_at = msg.get("sent_at")
+                stats.lat.append(np.nan if sent_at is None else wall - sent_at)
+                stats.ts.append(datetime.fromisoformat(msg["timestamp"]).timestamp())
+                stats.index.append(msg["index"])
+    except Exception as e:
+        stats.errors.append(repr(e))
+
+
+async def run_controller(
+    base_url: str,
+    rate: float,
+    speed: float,
+    commands: List[str],
+    stop_at: float,
+    latencies: List[float],
+):
+    """
+    rate komut / saniye hızında, commands listesini sırayla döndürerek istek atar.
+    """
+    if rate <= 0 or not commands:
+        return
+
+    routes = {
+        "status": ("GET", "/status"),
+        "speed": ("POST", f"/control/speed/{speed}"),
+        "events": ("GET", "/events?limit=50"),
+    }
+    period = 1.0 / rate
+    k = 0
+    next_at = time.monotonic()
+    while next_at < stop_at:
+        await asyncio.sleep(max(next_at - time.monotonic(), 0))
+        method, path = routes[commands[k % len(commands)]]
+        t0 = time.perf_counter()
+        try:
+            await asyncio.to_thread(_http, method, base_url + path)
+            latencies.append(time.perf_counter() - t0)
+        except OSError:
+            latencies.append(float("nan"))
+        k += 1
+        next_at += period
+
+
+# ==========================================
+# 4) Metrikler
+# ==========================================
+
+def percentiles_ms(values: np.ndarray) -> Dict:
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {"p50_ms": None, "p99_ms": None, "p999_ms": None, "max_ms": None}
+    p50, p99, p999 = np.percentile(values, [50, 99, 99.9])
+    return {
+        "p50_ms": float(p50 * 1e3),
+        "p99_ms": float(p99 * 1e3),
+        "p999_ms": float(p999 * 1e3),
+        "max_ms": float(values.max() * 1e3),
+    }
+
+
+def _replay_offsets(stats: ClientStats, speed: float) -> np.ndarray:
+    # recv_k - ideal_k: frame'in replay saatine göre kayması (drift dahil)
+    recv = np.asarray(stats.recv)
+    ts = np.asarray(stats.ts)
+    return recv - (ts - ts[0]) / speed
+
+
+def client_latencies(stats: ClientStats, measure_from: float) -> np.ndarray:
+    """
+    Ölçüm aralığındaki frame'lerin teslim gecikmesi (s): alınma anı - sunucunun sent_at'i.
+    sent_at taşımayan frame'ler atlanır.
+    """
+    recv = np.asarray(stats.recv)
+    lat = np.asarray(stats.lat, dtype=np.float64)
+    lat = lat[recv >= measure_from]
+    return lat[~np.isnan(lat)]
+
+
+def client_drift(stats: ClientStats, speed: float, measure_from: float) -> float | None:
+    """
+    Replay saatinin kayma hızı (ms / s): kaymanın zamana göre eğimi.
+    Sadece ölçüm aralığındaki frame'lerden (ısınmadaki tahminsiz frame'ler daha ucuz).
+    """
+    recv = np.asarray(stats.recv)
+    mask = recv >= measure_from
+    if mask.sum() < 2:
+        return None
+    slope = np.polyfit(recv[mask], _replay_offsets(stats, speed)[mask], 1)[0]
+    return float(slope * 1e3)
+
+
+def frame_gaps(stats: ClientStats, measure_from: float) -> Dict:
+    """
+    İleri yönde index atlamaları = kaçan frame; geri gidişler ayrıca sayılır.
+    """
+    idx = np.asarray(stats.index)
+    recv = np.asarray(stats.recv)
+    mask = recv >= measure_from
+    idx = idx[mask]
+    if idx.size < 2:
+        return {"dropped": 0, "rewinds": 0}
+    diff = np.diff(idx)
+    return {
+        "dropped": int(np.sum(diff[diff > 1] - 1)),
+        "rewinds": int(np.sum(diff < 0)),
+    }
+
+
+async def run_step(server: ServerProcess, n_clients: int, args) -> Dict:
+    _http("POST", f"{server.base_url}/control/speed/{args.speed}")
+    _http("POST", f"{server.base_url}/control/play")
+
+    start = time.monotonic()
+    stop_at = start + args.warmup + args.duration
+    measure_from = start + args.warmup
+
+    clients = [ClientStats() for _ in range(n_clients)]
+    control_latencies: List[float] = []
+
+    sampler = asyncio.create_task(server.sample_forever())
+    await asyncio.gather(
+        *(run_client(server.ws_url, stop_at, c) for c in clients),
+        run_controller(
+            server.base_url, args.control_rate, args.speed,
+            args.control_commands, stop_at, control_latencies,
+        ),
+    )
+    sampler.cancel()
+
+    lat = np.concatenate(
+        [client_latencies(c, measure_from) for c in clients]
+    ) if clients else np.array([])
+
+    frames = sum(int(np.sum(np.asarray(c.recv) >= measure_from)) for c in clients)
+    gaps = [frame_gaps(c, measure_from) for c in clients]
+    drifts = [
+        d for d in (client_drift(c, args.speed, measure_from) for c in clients)
+        if d is not None
+    ]
+    expected_fps = args.speed / SYNTHETIC_STEP_SECONDS
+    throughput = frames / args.duration
+
+    return {
+        "clients": n_clients,
+        "frames": frames,
+        "throughput_fps": throughput,
+        "per_client_fps": throughput / n_clients,
+        "expected_per_client_fps": expected_fps,
+        "efficiency": throughput / (n_clients * expected_fps),
+        "latency": percentiles_ms(lat),
+        "drift_ms_per_s": float(np.median(drifts)) if drifts else None,
+        "dropped_frames": sum(g["dropped"] for g in gaps),
+        "rewinds": sum(g["rewinds"] for g in gaps),
+        "episode_deltas": sum(c.deltas for c in clients),
+        "control": {
+            "requests": len(control_latencies),
+            **percentiles_ms(np.asarray(control_latencies)),
+        },
+        "server": server.resources(measure_from),
+        "client_errors": [e for c in clients for e in c.errors][:10],
+    }
+
+
+def find_saturation(
+    steps: List[Dict],
+    min_efficiency: float,
+    latency_budget_ms: float,
+    drift_budget_ms_per_s: float,
+) -> Dict:
+    """
+    Doyma noktası: client başı fps'in baseline'a (en az client'lı adım) oranının
+    min_efficiency altına düştüğü, p99 gecikmenin bütçeyi aştığı ya da replay
+    saatinin baseline'dan drift_budget_ms_per_s fazla kaydığı ilk client sayısı.
+    Her adıma relative_efficiency ve excess_drift_ms_per_s alanları eklenir.
+    """
+    if not steps:
+        return {
+            "baseline_clients": None,
+            "saturated_at_clients": None,
+            "peak_throughput_fps": None,
+            "peak_throughput_clients": None,
+        }
+
+    baseline = min(steps, key=lambda s: s["clients"])
+    base_fps = baseline["per_client_fps"]
+    base_drift = baseline["drift_ms_per_s"]
+    for step in steps:
+        step["relative_efficiency"] = step["per_client_fps"] / base_fps if base_fps > 0 else None
+        step["excess_drift_ms_per_s"] = (
+            step["drift_ms_per_s"] - base_drift
+            if step["drift_ms_per_s"] is not None and base_drift is not None else None
+        )
+
+    peak = max(steps, key=lambda s: s["throughput_fps"])
+    saturated = None
+    for step in sorted(steps, key=lambda s: s["clients"]):
+        p99 = step["latency"]["p99_ms"]
+        rel = step["relative_efficiency"]
+        drift = step["excess_drift_ms_per_s"]
+        if (
+            (rel is not None and rel < min_efficiency)
+            or (p99 is not None and p99 > latency_budget_ms)
+            or (drift is not None and drift > drift_budget_ms_per_s)
+        ):
+            saturated = step["clients"]
+            break
+
+    return {
+        "baseline_clients": baseline["clients"],
+        "saturated_at_clients": saturated,
+        "peak_throughput_fps": peak["throughput_fps"],
+        "peak_throughput_clients": peak["clients"],
+    }
+
+
+# ==========================================
+# 5) CLI
+# ==========================================
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="SWaT backend WebSocket yük testi")
+    p.add_argument("--clients", default="1,2,4,8,16",
+                   help="virgülle ayrılmış eşzamanlı client sayıları (her biri bir adım)")
+    p.add_argument("--duration", type=float, default=15.0, help="adım başına ölçüm süresi (s)")
+    p.add_argument("--warmup", type=float, default=8.0,
+                   help="ölçüme katılmayan ısınma süresi (s); model penceresi dolsun")
+    p.add_argument("--speed", type=float, default=20.0, help="replay hızı (1–20)")
+    p.add_argument("--control-rate", type=float, default=2.0, help="kontrol komutu / saniye")
+    p.add_argument("--control-commands", default=",".join(CONTROL_COMMANDS),
+                   help=f"döndürülecek komutlar ({', '.join(CONTROL_COMMANDS)})")
+    p.add_argument("--rows", type=int, default=20_000, help="sentetik CSV satır sayısı")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--latency-budget-ms", type=float, default=250.0)
+    p.add_argument("--drift-budget-ms-per-s", type=float, default=50.0,
+                   help="replay saatinin baseline'dan fazladan kayma hızı üst sınırı (ms / s)")
+    p.add_argument("--min-efficiency", type=float, default=0.9,
+                   help="baseline'a (en az client'lı adım) göre client başı fps oranı alt sınırı")
+    p.add_argument("--workdir", type=Path, default=None,
+                   help="sentetik veri / model / sunucu logu (varsayılan: geçici klasör)")
+    p.add_argument("--output", type=Path, default=None, help="JSON rapor yolu")
+    args = p.parse_args(argv)
+
+    args.clients = [int(c) for c in args.clients.split(",") if c.strip()]
+    args.control_commands = [c.strip() for c in args.control_commands.split(",") if c.strip()]
+    unknown = set(args.control_commands) - set(CONTROL_COMMANDS)
+    if unknown:
+        p.error(f"bilinmeyen kontrol komutu: {', '.join(sorted(unknown))}")
+    return args
+
+
+def print_table(steps: List[Dict]):
+    header = f"{'clients':>7} {'fps':>8} {'rel':>5} {'p50ms':>8} {'p99ms':>8} {'p999ms':>8} {'drift':>6} {'drop':>7} {'cpu%':>6} {'rssMB':>7}"
+    print(header)
+    print("-" * len(header))
+    fmt = lambda v, spec: format(v, spec) if v is not None else "-"
+    for s in steps:
+        lat, srv = s["latency"], s["server"]
+        print(
+            f"{s['clients']:>7} {s['throughput_fps']:>8.1f} {fmt(s.get('relative_efficiency'), '>5.2f')} "
+            f"{fmt(lat['p50_ms'], '>8.1f')} {fmt(lat['p99_ms'], '>8.1f')} {fmt(lat['p999_ms'], '>8.1f')} "
+            f"{fmt(s['drift_ms_per_s'], '>6.1f')} {s['dropped_frames']:>7} {fmt(srv['cpu_percent_mean'], '>6.0f')} {fmt(srv['rss_mb_max'], '>7.0f')}"
+        )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    tmp = None
+    if args.workdir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="swat-loadtest-")
+        workdir = Path(tmp.name)
+    else:
+        workdir = args.workdir
+        workdir.mkdir(parents=True, exist_ok=True)
+
+    csv_path = workdir / "synthetic.csv"
+    model_path = workdir / "random_weights.pt"
+    log_path = workdir / "server.log"
+
+    print(f"[LoadTest] Sentetik veri: {csv_path} ({args.rows} satır)")
+    feature_cols = make_synthetic_dataset(csv_path, args.rows, args.seed)
+    make_random_model(model_path, len(feature_cols), args.seed)
+
+    steps: List[Dict] = []
+    try:
+        for n in args.clients:
+            # Her adım temiz bir sunucuyla (paylaşılan playback / model state'i sıfır)
+            server = ServerProcess(csv_path, model_path, log_path)
+            server.start()
+            try:
+                print(f"[LoadTest] {n} client, {args.duration}s (+{args.warmup}s warmup)…")
+                steps.append(asyncio.run(run_step(server, n, args)))
+            finally:
+                server.stop()
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "clients": args.clients,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "speed": args.speed,
+            "control_rate": args.control_rate,
+            "control_commands": args.control_commands,
+            "rows": args.rows,
+            "n_features": len(feature_cols),
+            "seed": args.seed,
+            "latency_budget_ms": args.latency_budget_ms,
+            "min_efficiency": args.min_efficiency,
+            "drift_budget_ms_per_s": args.drift_budget_ms_per_s,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "steps": steps,
+        "saturation": find_saturation(
+            steps, args.min_efficiency, args.latency_budget_ms, args.drift_budget_ms_per_s
+        ),
+    }
+
+    output = args.output or Path(f"loadtest_{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w") as f:
+        json.dump(report, f, indent=2)
+
+    print()
+    print_table(steps)
+    print()
+    print(f"[LoadTest] Doyma noktası: {report['saturation']}")
+    print(f"[LoadTest] Rapor: {output}")
+
+
+if __name__ == "__main__":
+    main()
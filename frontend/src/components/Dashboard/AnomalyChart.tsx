@@ -43,9 +43,10 @@ export const AnomalyChart: React.FC<AnomalyChartProps> = ({
       second: '2-digit',
     });
 
-  // Use real timestamps from TrendPoint[]
-  const timeLabels = sensor.trend.map(p => formatTs(p.ts));
-  const values = sensor.trend.map(p => p.value);
+  // Use real timestamps from the trend ring buffer
+  const trendLength = sensor.trend.length;
+  const timeLabelAt = (index: number) => formatTs(sensor.trend.tsAt(index));
+  const values = Array.from({ length: trendLength }, (_, i) => sensor.trend.valueAt(i));
 
 
   // Create smooth curve path
@@ -85,7 +86,7 @@ export const AnomalyChart: React.FC<AnomalyChartProps> = ({
   const yTicks = [0, 0.2, 0.4, 0.6, 0.8, 1.0];
   
   // X-axis ticks (show every 5th time label)
-  const xTickIndices = Array.from({ length: Math.ceil(timeLabels.length / 5) }, (_, i) => i * 5);
+  const xTickIndices = Array.from({ length: Math.ceil(trendLength / 5) }, (_, i) => i * 5);
 
   useEffect(() => {
     // Animate path drawing
@@ -106,7 +107,7 @@ export const AnomalyChart: React.FC<AnomalyChartProps> = ({
         fill: 'forwards'
       });
     }
-  }, [sensor.trend]);
+  }, [sensor.trend.version]);
 
   return (
     <div className="bg-gray-800 rounded-xl border border-gray-700 p-6 shadow-2xl h-full flex flex-col">
@@ -211,8 +212,8 @@ export const AnomalyChart: React.FC<AnomalyChartProps> = ({
           
           {/* X-axis labels */}
           {xTickIndices.map((index) => {
-            if (index >= timeLabels.length) return null;
-            const x = padding.left + (index / (timeLabels.length - 1)) * innerWidth;
+            if (index >= trendLength) return null;
+            const x = padding.left + (index / (trendLength - 1)) * innerWidth;
             return (
               <text
                 key={index}
@@ -222,7 +223,7 @@ export const AnomalyChart: React.FC<AnomalyChartProps> = ({
                 fill="#9CA3AF"
                 fontSize="10"
               >
-                {timeLabels[index]}
+                {timeLabelAt(index)}
               </text>
             );
           })}
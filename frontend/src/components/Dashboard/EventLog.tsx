@@ -51,6 +51,7 @@ export const EventLog: React.FC<EventLogProps> = ({ events }) => {
                   {getIcon(event.severity)}
                   <span className="text-sm font-medium text-white">
                     {formatTime(event.timestamp)}
+                    {event.endTimestamp && ` – ${formatTime(event.endTimestamp)}`}
                   </span>
                 </div>
                 <span className={`px-2 py-1 rounded-full text-xs font-medium ${
@@ -73,6 +74,12 @@ export const EventLog: React.FC<EventLogProps> = ({ events }) => {
                   Sensor: {event.sensor} | Value: {event.value.toFixed(2)}
                 </p>
               )}
+
+              {event.topSensors && event.topSensors.length > 0 && (
+                <p className="text-xs text-gray-400">
+                  Top sensors: {event.topSensors.join(', ')}
+                </p>
+              )}
             </div>
           ))
         )}
@@ -1,23 +1,14 @@
 import React from "react";
-import { HeatmapData } from "../../types";
+import { HeatmapSeries } from "../../types";
 
 interface HeatmapProps {
-  data: HeatmapData[];
+  data: HeatmapSeries;
 }
 
 export const Heatmap: React.FC<HeatmapProps> = ({ data }) => {
-  const sensors = [...new Set(data.map((d) => d.sensor))];
-  const timeSlots = [...new Set(data.map((d) => d.time))].sort();
-
-  const getIntensity = (sensor: string, time: string) => {
-    const point = data.find((d) => d.sensor === sensor && d.time === time);
-    return point ? point.value : 0;
-  };
-
-  const isAnomaly = (sensor: string, time: string) => {
-    const point = data.find((d) => d.sensor === sensor && d.time === time);
-    return point ? point.anomaly : false;
-  };
+  const sensors = data.sensors;
+  // Zaman dilimleri eskiden yeniye (ızgara slot index'leri)
+  const timeSlots = Array.from({ length: data.length }, (_, slot) => slot);
 
   const getColor = (intensity: number, anomaly: boolean) => {
     if (anomaly) {
@@ -47,33 +38,33 @@ export const Heatmap: React.FC<HeatmapProps> = ({ data }) => {
             <div className="text-xs font-medium text-gray-400 p-2">
               Sensors / Time
             </div>
-            {timeSlots.map((time) => (
+            {timeSlots.map((slot) => (
               <div
-                key={time}
+                key={slot}
                 className="text-xs text-gray-400 text-center p-1 min-w-[30px]"
               >
-                {time}
+                {data.slotLabel(slot)}
               </div>
             ))}
 
             {/* Data rows */}
-            {sensors.map((sensor) => (
+            {sensors.map((sensor, sensorIndex) => (
               <React.Fragment key={sensor}>
                 <div className="text-sm text-gray-300 p-2 flex items-center font-medium bg-gray-800 rounded">
                   {sensor}
                 </div>
 
-                {timeSlots.map((time) => {
-                  const intensity = getIntensity(sensor, time);
-                  const anomaly = isAnomaly(sensor, time);
-
-                  const point = data.find(
-                    (d) => d.sensor === sensor && d.time === time
-                  );
+                {timeSlots.map((slot) => {
+                  const time = data.slotLabel(slot);
+                  const intensity = data.intensityAt(sensorIndex, slot);
+                  const flag = data.flagAt(sensorIndex, slot);
+                  const zScore = data.zAt(sensorIndex, slot);
+                  // sadece critical olanlar kırmızı
+                  const anomaly = flag === "critical";
 
                   return (
                     <div
-                      key={`${sensor}-${time}`}
+                      key={`${sensor}-${slot}`}
                       className="aspect-square rounded border border-gray-600 transition-all duration-200 hover:scale-110 hover:z-10 cursor-pointer relative group min-w-[30px] min-h-[30px]"
                       style={{
                         backgroundColor: getColor(intensity, anomaly),
@@ -101,28 +92,28 @@ export const Heatmap: React.FC<HeatmapProps> = ({ data }) => {
                         <div>Time: {time}</div>
 
                         {/* Deviation (z-score) */}
-                        {point?.zScore !== undefined && (
-                          <div>Deviation: {point.zScore.toFixed(2)}σ</div>
+                        {zScore !== undefined && (
+                          <div>Deviation: {zScore.toFixed(2)}σ</div>
                         )}
 
                         {/* Intensity */}
                         <div>Intensity: {(intensity * 100).toFixed(1)}%</div>
 
                         {/* Model flag */}
-                        {point?.flag && (
+                        {flag && (
                           <div className="mt-1">
                             Level:
                             <span
                               className={
                                 "ml-1 px-1.5 py-0.5 rounded text-[0.7rem] font-semibold " +
-                                (point.flag === "critical"
+                                (flag === "critical"
                                   ? "bg-red-500/80 text-red-50"
-                                  : point.flag === "warning"
+                                  : flag === "warning"
                                   ? "bg-yellow-400/80 text-gray-900"
                                   : "bg-cyan-400/70 text-gray-900")
                               }
                             >
-                              {point.flag}
+                              {flag}
                             </span>
                           </div>
                         )}
@@ -1,6 +1,7 @@
 import React from 'react';
 import { TrendingUp, TrendingDown, Minus } from 'lucide-react';
 import { SensorData } from '../../types';
+import { seriesWindow } from '../../lib/ringBuffer';
 
 interface MetricCardProps {
   sensor: SensorData;
@@ -8,13 +9,15 @@ interface MetricCardProps {
 
 export const MetricCard: React.FC<MetricCardProps> = ({ sensor }) => {
   const getTrendIcon = () => {
-    // TrendPoint[] -> number[]
-    const recentValues = sensor.trend.slice(-5).map(p => p.value);
+    // Son 5 noktanın ortalaması (ring buffer üzerinden, kopyasız)
+    const { start, count } = seriesWindow(sensor.trend, 5);
     const current = sensor.value;
 
-    if (recentValues.length === 0) return <Minus className="w-4 h-4 text-gray-400" />;
+    if (count === 0) return <Minus className="w-4 h-4 text-gray-400" />;
 
-    const average = recentValues.reduce((sum, v) => sum + v, 0) / recentValues.length;
+    let sum = 0;
+    for (let i = start; i < start + count; i++) sum += sensor.trend.valueAt(i);
+    const average = sum / count;
 
     if (current > average * 1.05) return <TrendingUp className="w-4 h-4 text-green-400" />;
     if (current < average * 0.95) return <TrendingDown className="w-4 h-4 text-red-400" />;
@@ -72,9 +75,12 @@ export const MetricCard: React.FC<MetricCardProps> = ({ sensor }) => {
     return path;
   };
 
-  // TrendPoint[] -> number[]
-  const sparklinePoints = sensor.trend.slice(-15);
-  const sparklineData = sparklinePoints.map(p => p.value);
+  // Son 15 nokta
+  const sparklineWindow = seriesWindow(sensor.trend, 15);
+  const sparklineData = Array.from(
+    { length: sparklineWindow.count },
+    (_, i) => sensor.trend.valueAt(sparklineWindow.start + i)
+  );
   const sparklinePath = createSparklinePath(sparklineData);
 
   const sparkMin = sparklineData.length ? Math.min(...sparklineData) : sensor.value;
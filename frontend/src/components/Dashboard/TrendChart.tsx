@@ -1,5 +1,6 @@
 import React from 'react';
-import { SensorData } from '../../types';
+import { SensorData, TrendSeries } from '../../types';
+import { seriesWindow } from '../../lib/ringBuffer';
 
 interface TrendChartProps {
   title: string;
@@ -44,8 +45,6 @@ export const TrendChart: React.FC<TrendChartProps> = ({
   // -------------------------
   const WINDOW_SIZE = 200;
 
-  const getWindow = <T,>(arr: T[], size: number) => (arr.length <= size ? arr : arr.slice(-size));
-
   const formatTs = (ts: number) =>
     new Date(ts).toLocaleTimeString('en-US', {
       hour12: false,
@@ -55,17 +54,27 @@ export const TrendChart: React.FC<TrendChartProps> = ({
     });
 
   // -------------------------
-  // Y-scale: values üzerinden (TrendPoint.value)
+  // Y-scale: ring buffer değerleri üzerinden
   // -------------------------
-  const allValues = sensors.flatMap(sensor => sensor.trend.map(p => p.value));
-  if (showThreshold && thresholdValue) allValues.push(thresholdValue);
+  let rawMin = Infinity;
+  let rawMax = -Infinity;
+  sensors.forEach(sensor => {
+    const { start, count } = seriesWindow(sensor.trend, WINDOW_SIZE);
+    for (let i = start; i < start + count; i++) {
+      const v = sensor.trend.valueAt(i);
+      if (v < rawMin) rawMin = v;
+      if (v > rawMax) rawMax = v;
+    }
+  });
+  if (showThreshold && thresholdValue) {
+    rawMin = Math.min(rawMin, thresholdValue);
+    rawMax = Math.max(rawMax, thresholdValue);
+  }
 
   let minValue = 0;
   let maxValue = 1;
 
-  if (allValues.length > 0) {
-    const rawMin = Math.min(...allValues);
-    const rawMax = Math.max(...allValues);
+  if (rawMin <= rawMax) {
     const span = rawMax - rawMin || 1;
     const paddingFactor = 0.1; // %10 boşluk
 
@@ -76,22 +85,35 @@ export const TrendChart: React.FC<TrendChartProps> = ({
   const range = maxValue - minValue || 1;
 
   // -------------------------
-  // X labels: gerçek timestamp'ler (TrendPoint.ts)
+  // X labels: gerçek timestamp'ler (TrendSeries.tsAt)
   // -------------------------
-  const baseTrend = getWindow(sensors[0]?.trend ?? [], WINDOW_SIZE);
-  const timeLabels = baseTrend.map(p => formatTs(p.ts));
+  const baseTrend = sensors[0]?.trend;
+  const baseWindow = baseTrend ? seriesWindow(baseTrend, WINDOW_SIZE) : { start: 0, count: 0 };
+  const timeLabelAt = (index: number) =>
+    baseTrend ? formatTs(baseTrend.tsAt(baseWindow.start + index)) : '';
 
   // -------------------------
   // Paths
   // -------------------------
-  const createSmoothPath = (data: number[]) => {
-    if (data.length < 2) return '';
-    const denom = Math.max(data.length - 1, 1);
+  const toPoints = (trend: TrendSeries) => {
+    const { start, count } = seriesWindow(trend, WINDOW_SIZE);
+    const denom = Math.max(count - 1, 1);
+    const points = new Array<{ x: number; y: number; value: number }>(count);
+
+    for (let j = 0; j < count; j++) {
+      const value = trend.valueAt(start + j);
+      points[j] = {
+        x: padding.left + (j / denom) * innerWidth,
+        y: padding.top + (1 - (value - minValue) / range) * innerHeight,
+        value
+      };
+    }
 
-    const points = data.map((value, index) => ({
-      x: padding.left + (index / denom) * innerWidth,
-      y: padding.top + (1 - (value - minValue) / range) * innerHeight
-    }));
+    return points;
+  };
+
+  const createSmoothPath = (points: { x: number; y: number }[]) => {
+    if (points.length < 2) return '';
 
     let path = `M ${points[0].x} ${points[0].y}`;
 
@@ -111,16 +133,10 @@ export const TrendChart: React.FC<TrendChartProps> = ({
     return path;
   };
 
-  const createAreaPath = (data: number[]) => {
-    if (data.length < 2) return '';
-    const denom = Math.max(data.length - 1, 1);
+  const createAreaPath = (points: { x: number; y: number }[]) => {
+    if (points.length < 2) return '';
     const baseY = padding.top + innerHeight;
 
-    const points = data.map((value, index) => ({
-      x: padding.left + (index / denom) * innerWidth,
-      y: padding.top + (1 - (value - minValue) / range) * innerHeight
-    }));
-
     const first = points[0];
     const last = points[points.length - 1];
 
@@ -149,7 +165,7 @@ export const TrendChart: React.FC<TrendChartProps> = ({
 
   // X-axis ticks: sabit sayıda tick, sabit konum (label içerikleri güncellenir)
   const MAX_X_TICKS = 12;
-  const labelCount = timeLabels.length;
+  const labelCount = baseWindow.count;
   const xTickCount = Math.min(MAX_X_TICKS, Math.max(labelCount, 2));
 
   const xTickIndices = Array.from({ length: xTickCount }, (_, i) => {
@@ -205,7 +221,7 @@ export const TrendChart: React.FC<TrendChartProps> = ({
 
           {/* X-axis labels */}
           {xTickIndices.map((dataIndex, tickPos) => {
-            if (dataIndex >= timeLabels.length) return null;
+            if (dataIndex >= labelCount) return null;
             const x = padding.left + (tickPos / Math.max(xTickCount - 1, 1)) * innerWidth;
             return (
               <text
@@ -216,7 +232,7 @@ export const TrendChart: React.FC<TrendChartProps> = ({
                 fill="#9CA3AF"
                 fontSize="10"
               >
-                {timeLabels[dataIndex]}
+                {timeLabelAt(dataIndex)}
               </text>
             );
           })}
@@ -261,11 +277,10 @@ export const TrendChart: React.FC<TrendChartProps> = ({
           {sensors.map((sensor, index) => {
             const color = colors[index % colors.length];
 
-            const windowTrendPoints = getWindow(sensor.trend, WINDOW_SIZE);
-            const windowTrend = windowTrendPoints.map(p => p.value);
+            const points = toPoints(sensor.trend);
 
-            const linePath = createSmoothPath(windowTrend);
-            const areaPath = createAreaPath(windowTrend);
+            const linePath = createSmoothPath(points);
+            const areaPath = createAreaPath(points);
 
             return (
               <g key={sensor.id}>
@@ -280,11 +295,7 @@ export const TrendChart: React.FC<TrendChartProps> = ({
                   className="transition-all duration-300"
                 />
 
-                {windowTrend.map((value, pointIndex) => {
-                  const denom = Math.max(windowTrend.length - 1, 1);
-                  const x = padding.left + (pointIndex / denom) * innerWidth;
-                  const y = padding.top + (1 - (value - minValue) / range) * innerHeight;
-
+                {points.map(({ x, y, value }, pointIndex) => {
                   return (
                     <circle
                       key={pointIndex}
@@ -1,30 +1,24 @@
 // src/hooks/useSwatRealtimeData.ts
-import { useEffect, useRef, useState } from "react";
-import { SensorData, AnomalyEvent, HeatmapData } from "../types";
+import { useEffect, useState } from "react";
+import { SensorData, AnomalyEvent, HeatmapSeries } from "../types";
+import { TrendRingBuffer } from "../lib/ringBuffer";
+import { HeatmapGrid } from "../lib/heatmapGrid";
+import {
+  BackendEpisode,
+  StreamBatch,
+  StreamWorkerCommand,
+  StreamWorkerEvent,
+  decodeFlag,
+} from "../workers/streamProtocol";
 
 // Backend WebSocket URL'i – istersen .env ile override edebilirsin
 const WS_URL =
   (import.meta as any).env?.VITE_BACKEND_WS_URL ??
   "ws://localhost:8000/ws/stream";
 
-type BackendPrediction = {
-  anomaly_score: number;
-  is_attack: boolean;
-
-  // backend/model.py'den gelen yeni alanlar:
-  per_feature_error?: Record<string, number>;
-  per_feature_z?: Record<string, number>;
-  per_feature_flag?: Record<string, "normal" | "warning" | "critical">;
-  per_feature_intensity?: Record<string, number>;
-} | null;
-
-type BackendMessage = {
-  index: number;
-  timestamp: string;
-  sensors: Record<string, number>;
-  label: number | string | null;
-  prediction: BackendPrediction;
-};
+// Backend REST URL'i (/events geçmişi için)
+const API_BASE =
+  (import.meta as any).env?.VITE_BACKEND_HTTP_URL ?? "http://localhost:8000";
 
 // SWaT tarafında UI'da göstermek istediğin sensörler.
 // id'ler backend'den gelen "sensors" key'leri ile aynı olmalı.
@@ -63,198 +57,211 @@ const SENSOR_META: Omit<SensorData, "value" | "trend">[] = [
 // Trend kuyruk uzunluğu (kartlarda ve grafikte kullanılacak)
 const MAX_TREND_LENGTH = 150;
 
+// Heatmap'te tutulan maksimum 30 saniyelik zaman dilimi sayısı
+const MAX_TIME_BUCKETS = 19;
+
+// Event log'da tutulan son event sayısı
+const MAX_EVENTS = 50;
+
 // hook imzasını şimdilik useSimulatedData ile uyumlu tutuyoruz.
 // speed parametresini şu an backend'e göndermiyoruz, sadece signture'ı bozmayalım diye duruyor.
+//
+// Akış:
+// - WebSocket + JSON decode swatStream.worker'da yapılır; worker frame'leri
+//   typed array batch'leri halinde gönderir.
+// - Batch'ler sensör başına TrendRingBuffer'lara ve HeatmapGrid'e yazılır
+//   (mesaj başına allocation yok).
+// - React state'i animasyon karesi başına en fazla bir kez yayınlanır.
 export const useSwatRealtimeData = (_speed: number = 1) => {
   const [sensors, setSensors] = useState<SensorData[]>([]);
   const [events, setEvents] = useState<AnomalyEvent[]>([]);
-  const [heatmapData, setHeatmapData] = useState<HeatmapData[]>([]);
+  const [heatmap, setHeatmap] = useState<HeatmapSeries>(
+    () => new HeatmapGrid(MAX_TIME_BUCKETS)
+  );
   const [currentTimestamp, setCurrentTimestamp] = useState<string | null>(null);
 
-  const wsRef = useRef<WebSocket | null>(null);
-  const lastAttackRef = useRef<boolean>(false); // ardışık is_attack=true'larda event spam'i önlemek için
-
   useEffect(() => {
-    const ws = new WebSocket(WS_URL);
-    wsRef.current = ws;
+    const buffers = SENSOR_META.map(() => new TrendRingBuffer(MAX_TREND_LENGTH));
+    const lastFlags = new Uint8Array(SENSOR_META.length);
+    const grid = new HeatmapGrid(MAX_TIME_BUCKETS);
+    setHeatmap(grid);
+
+    // id -> en güncel hali; aynı episode'un start + end'i tek event olur
+    let pendingEvents = new Map<string, AnomalyEvent>();
+    let lastTimestamp: string | null = null;
+    let hasData = false; // son publish'ten beri yeni frame geldi mi
+    let frameRequest: number | null = null;
+
+    // Birikmiş değişiklikleri tek seferde React state'ine yansıt
+    const publish = () => {
+      frameRequest = null;
+
+      if (hasData) {
+        setCurrentTimestamp(lastTimestamp);
+
+        setSensors(
+          SENSOR_META.map((meta, k) => {
+            const trend = buffers[k];
+            const value = trend.length > 0 ? trend.valueAt(trend.length - 1) : 0;
+            const modelFlag = decodeFlag(lastFlags[k]);
+
+            // sadece anomaly_score pseudo-sensörü için eski threshold'u kullanıyoruz
+            const status =
+              modelFlag ??
+              (meta.id === "anomaly_score"
+                ? determineStatus(meta.id, value)
+                : "normal");
+
+            return { ...meta, value, trend, status };
+          })
+        );
+        hasData = false;
+      }
 
-    ws.onopen = () => {
-      console.log("[WS] Connected to", WS_URL);
+      if (pendingEvents.size > 0) {
+        const fresh = Array.from(pendingEvents.values()).reverse();
+        pendingEvents = new Map();
+        setEvents((prev) => mergeEvents(prev, fresh));
+      }
     };
 
-    ws.onmessage = (event) => {
-      const data: BackendMessage = JSON.parse(event.data);
-      // console.log("[WS] message", data);
-      const ts = new Date(data.timestamp);
-      setCurrentTimestamp(data.timestamp);
-
-      // 1) Sensor kartları / trend verisi
-      setSensors((prev) => {
-        const map = new Map<string, SensorData>();
-        prev.forEach((s) => map.set(s.id, s));
-
-        const perFeatureFlag = data.prediction?.per_feature_flag ?? {};
-
-        SENSOR_META.forEach((meta) => {
-          const existing = map.get(meta.id);
-
-          const sensorKey = meta.id;
-
-          // backend'den gelen ham değer:
-          const backendValue =
-            sensorKey === "anomaly_score"
-              ? data.prediction?.anomaly_score
-              : data.sensors[sensorKey];
-
-          const rawValue =
-            typeof backendValue === "number" && Number.isFinite(backendValue)
-              ? backendValue
-              : 0;
-
-          const point = { ts: ts.getTime(), value: rawValue };
-
-          const trend = existing
-            ? [...existing.trend, point].slice(-MAX_TREND_LENGTH)
-            : [point];
-
-          const modelFlag = perFeatureFlag[meta.id];
-
-          const status: "normal" | "warning" | "critical" =
-            modelFlag === "normal" ||
-            modelFlag === "warning" ||
-            modelFlag === "critical"
-              ? modelFlag
-              : // sadece anomaly_score pseudo-sensörü için eski threshold'u kullanıyoruz
-              meta.id === "anomaly_score"
-              ? determineStatus(meta.id, rawValue)
-              : "normal";
-
-          map.set(meta.id, {
-            ...meta,
-            value: rawValue,
-            trend,
-            status,
-          });
-        });
-
-        return Array.from(map.values());
-      });
-
-      // 2) Anomaly Event Log
-      const fromLabelAttack =
-        typeof data.label === "string" && data.label === "attack";
-
-      const fromModelAttack = !!data.prediction?.is_attack;
-
-      const isAttack = fromLabelAttack || fromModelAttack;
-      const score = data.prediction?.anomaly_score ?? 0;
-
-      if (isAttack && !lastAttackRef.current) {
-        const severity: AnomalyEvent["severity"] =
-          score > 0.9 ? "high" : score > 0.75 ? "medium" : "low";
-
-        const newEvent: AnomalyEvent = {
-          id: `${data.index}`,
-          timestamp: ts,
-          severity,
-          message: fromModelAttack
-            ? `Model detected anomaly`
-            : "Attack segment",
-          sensor: "anomaly_score",
-          value: score,
-        };
-
-        console.log("[EVENT] adding anomaly event", newEvent);
-        setEvents((prev) => [newEvent, ...prev].slice(0, 50)); // son 50 event'i tut
+    const onBatch = (batch: StreamBatch) => {
+      if (batch.featureNames !== null) {
+        grid.setSensors(batch.featureNames);
       }
 
-      lastAttackRef.current = isAttack;
-
-      // 3) Heatmap verisi
-      setHeatmapData((prev) => {
-        const perFeatureIntensity =
-          data.prediction?.per_feature_intensity ?? {};
-        const perFeatureFlag = data.prediction?.per_feature_flag ?? {};
-        const perFeatureZ = data.prediction?.per_feature_z ?? {};
-
-        // 🔸 30 saniyelik zaman bucket'ı
-        const bucketMs = 30_000; // 30 saniye
-        const bucketTime =
-          Math.floor(ts.getTime() / bucketMs) * bucketMs;
-
-        const bucketDate = new Date(bucketTime);
-
-        // const timeKey = ts.toLocaleTimeString(); // bucket kurmak için kaldırdık
-
-        const timeKey = bucketDate.toLocaleTimeString(undefined, {
-          hour: "2-digit",
-          minute: "2-digit",
-          second: "2-digit",
-          hour12: false,
-        });
-
-        // Bu 30 saniyelik dilim için tüm sensörlerin satırlarını oluştur
-        const newRows: HeatmapData[] = Object.keys(data.sensors).map((sensor) => {
-          const intensity = perFeatureIntensity[sensor] ?? 0;
-          const flag = perFeatureFlag[sensor];
-          const anomaly = flag === "critical";
-          const z = perFeatureZ[sensor] ?? 0;
-
-          return {
-            sensor,
-            time: timeKey,
-            value: intensity, // 0–1, heatmap rengi için
-            anomaly,          // sadece critical olanlar kırmızı
-            zScore: z,
-            flag,
-          };
-        });
-
-        // Önce eski + yeni veriyi birleştir
-        const merged = [...prev, ...newRows];
-
-        // 🔸 Tüm timeKey'ler içinden benzersiz zamanları sırayla al
-        const uniqueTimes = Array.from(
-          new Set(merged.map((d) => d.time))
-        );
+      const nSensors = SENSOR_META.length;
+      const nFeatures = grid.sensors.length;
 
-        // Maksimum 19 farklı zaman dilimi tutmak istiyoruz
-        const MAX_TIME_BUCKETS = 19;
+      for (let f = 0; f < batch.count; f++) {
+        const ts = batch.timestamps[f];
 
-        if (uniqueTimes.length <= MAX_TIME_BUCKETS) {
-          return merged;
+        // 1) Sensor kartları / trend verisi
+        const base = f * nSensors;
+        for (let k = 0; k < nSensors; k++) {
+          const v = batch.sensorValues[base + k];
+          buffers[k].push(ts, Number.isFinite(v) ? v : 0);
+          lastFlags[k] = batch.sensorFlags[base + k];
         }
 
-        // Sadece son 19 zaman dilimini tut
-        const allowedTimes = new Set(
-          uniqueTimes.slice(-MAX_TIME_BUCKETS)
+        // 2) Heatmap verisi
+        grid.push(
+          ts,
+          batch.featureIntensity,
+          batch.featureZ,
+          batch.featureFlags,
+          f * nFeatures
         );
+      }
 
-        const trimmed = merged.filter((d) =>
-          allowedTimes.has(d.time)
-        );
+      lastTimestamp = batch.lastTimestamp;
+      hasData = true;
+
+      if (frameRequest === null) {
+        frameRequest = requestAnimationFrame(publish);
+      }
+    };
 
-        return trimmed;
-      });
+    const worker = new Worker(
+      new URL("../workers/swatStream.worker.ts", import.meta.url),
+      { type: "module" }
+    );
+
+    // Anomaly Event Log: episode'lar backend'de çıkarılıyor,
+    // burada sadece start / end delta'ları event listesine yansıtılıyor.
+    const onEpisode = (episode: BackendEpisode) => {
+      const ev = episodeToEvent(episode);
+      pendingEvents.delete(ev.id); // Map sırası = geliş sırası
+      pendingEvents.set(ev.id, ev);
+      if (frameRequest === null) {
+        frameRequest = requestAnimationFrame(publish);
+      }
     };
 
-    ws.onerror = (err) => {
-      console.error("[WS] Error:", err);
+    // Yeniden bağlanan client geçmişi /events'ten alır
+    let cancelled = false;
+    fetch(`${API_BASE}/events?source=all&limit=${MAX_EVENTS}`)
+      .then((res) => res.json())
+      .then((body: { episodes: BackendEpisode[] }) => {
+        if (cancelled) return;
+        const history = body.episodes.map(episodeToEvent).reverse();
+        // canlı gelen delta'lar geçmişten daha günceldir
+        setEvents((prev) => mergeEvents(history, prev));
+      })
+      .catch((err) => console.error("[Events] history fetch failed:", err));
+
+    worker.onmessage = (event: MessageEvent<StreamWorkerEvent>) => {
+      const msg = event.data;
+      if (msg.type === "batch") {
+        onBatch(msg);
+      } else if (msg.type === "episode") {
+        onEpisode(msg.episode);
+      } else if (msg.status === "open") {
+        console.log("[WS] Connected to", WS_URL);
+      } else if (msg.status === "error") {
+        console.error("[WS] Error");
+      } else {
+        console.log("[WS] Closed");
+      }
     };
 
-    ws.onclose = () => {
-      console.log("[WS] Closed");
+    const connect: StreamWorkerCommand = {
+      type: "connect",
+      url: WS_URL,
+      sensorIds: SENSOR_META.map((m) => m.id),
     };
+    worker.postMessage(connect);
 
     // cleanup
     return () => {
-      ws.close();
+      cancelled = true;
+      if (frameRequest !== null) cancelAnimationFrame(frameRequest);
+      worker.terminate(); // worker'daki WebSocket de kapanır
     };
   }, []);
 
-  return { sensors, events, heatmapData, currentTimestamp };
+  return { sensors, events, heatmap, currentTimestamp };
 };
 
+// Backend episode'unu Event Log satırına çevirir
+function episodeToEvent(episode: BackendEpisode): AnomalyEvent {
+  const score = episode.peak_score ?? 0;
+  const fromLabel = episode.source === "label";
+  const severity: AnomalyEvent["severity"] = fromLabel
+    ? "high"
+    : score > 0.9 ? "high" : score > 0.75 ? "medium" : "low";
+
+  const message = fromLabel
+    ? episode.open
+      ? "Attack segment"
+      : `Attack segment (${episode.frames} frames)`
+    : episode.open
+      ? "Model detected anomaly"
+      : `Anomaly episode (${episode.frames} frames)`;
+
+  return {
+    // model episode'u ile label segmentinin id'leri ayrı sayaçlardan gelir
+    id: `${episode.source}-${episode.id}`,
+    timestamp: new Date(episode.start_timestamp),
+    endTimestamp: episode.open ? undefined : new Date(episode.end_timestamp),
+    severity,
+    message,
+    sensor: "anomaly_score",
+    value: score,
+    topSensors: episode.top_sensors.map((s) => s.sensor),
+  };
+}
+
+// updates öne eklenir, base'te aynı id'li eski kayıtların yerini alır.
+// Listeler en yeniden eskiye sıralı; son MAX_EVENTS event tutulur.
+function mergeEvents(
+  base: AnomalyEvent[],
+  updates: AnomalyEvent[]
+): AnomalyEvent[] {
+  const ids = new Set(updates.map((e) => e.id));
+  return [...updates, ...base.filter((e) => !ids.has(e.id))].slice(0, MAX_EVENTS);
+}
+
 // Sensör kartlarında kullanılacak status hesaplama fonksiyonu
 function determineStatus(
   sensorId: string,
@@ -0,0 +1,108 @@
+// src/lib/heatmapGrid.ts
+import { HeatmapSeries, SensorFlag } from "../types";
+import { FLAG_NONE, decodeFlag } from "../workers/streamProtocol";
+
+// Zaman bucket'ı (30 saniye)
+const BUCKET_MS = 30_000;
+
+// sensör x zaman-dilimi ızgarası; her dilim typed array'lerde tek satır.
+// Bir dilime ilk düşen frame o hücreyi belirler (eski davranışla aynı),
+// aynı dilimdeki sonraki frame'ler yazma yapmadan atlanır.
+export class HeatmapGrid implements HeatmapSeries {
+  readonly slotCount: number;
+
+  private names: string[] = [];
+  private bucketKeys: Float64Array;
+  private labels: string[];
+  private intensity = new Float64Array(0);
+  private z = new Float64Array(0);
+  private flags = new Uint8Array(0);
+  private head = 0;
+  private size = 0;
+  private writes = 0;
+
+  constructor(slotCount: number) {
+    this.slotCount = slotCount;
+    this.bucketKeys = new Float64Array(slotCount);
+    this.labels = new Array<string>(slotCount).fill("");
+  }
+
+  get sensors(): readonly string[] {
+    return this.names;
+  }
+
+  get length(): number {
+    return this.size;
+  }
+
+  get version(): number {
+    return this.writes;
+  }
+
+  // Feature listesi değişirse ızgara sıfırdan kurulur
+  setSensors(names: string[]): void {
+    this.names = names;
+    const cells = this.slotCount * names.length;
+    this.intensity = new Float64Array(cells);
+    this.z = new Float64Array(cells);
+    this.flags = new Uint8Array(cells);
+    this.head = 0;
+    this.size = 0;
+    this.writes++;
+  }
+
+  push(
+    tsMs: number,
+    intensity: Float64Array,
+    z: Float64Array,
+    flags: Uint8Array,
+    offset: number
+  ): void {
+    const n = this.names.length;
+    if (n === 0) return;
+
+    const bucket = Math.floor(tsMs / BUCKET_MS) * BUCKET_MS;
+    if (this.size > 0 && this.bucketKeys[this.physical(this.size - 1)] === bucket) {
+      return;
+    }
+
+    const slot = this.head;
+    this.bucketKeys[slot] = bucket;
+    this.labels[slot] = new Date(bucket).toLocaleTimeString(undefined, {
+      hour: "2-digit",
+      minute: "2-digit",
+      second: "2-digit",
+      hour12: false,
+    });
+
+    const base = slot * n;
+    this.intensity.set(intensity.subarray(offset, offset + n), base);
+    this.z.set(z.subarray(offset, offset + n), base);
+    this.flags.set(flags.subarray(offset, offset + n), base);
+
+    this.head = (this.head + 1) % this.slotCount;
+    if (this.size < this.slotCount) this.size++;
+    this.writes++;
+  }
+
+  slotLabel(slot: number): string {
+    return this.labels[this.physical(slot)];
+  }
+
+  intensityAt(sensor: number, slot: number): number {
+    return this.intensity[this.physical(slot) * this.names.length + sensor];
+  }
+
+  zAt(sensor: number, slot: number): number | undefined {
+    const cell = this.physical(slot) * this.names.length + sensor;
+    return this.flags[cell] === FLAG_NONE ? undefined : this.z[cell];
+  }
+
+  flagAt(sensor: number, slot: number): SensorFlag | undefined {
+    return decodeFlag(this.flags[this.physical(slot) * this.names.length + sensor]);
+  }
+
+  private physical(slot: number): number {
+    return (this.head - this.size + slot + this.slotCount) % this.slotCount;
+  }
+}
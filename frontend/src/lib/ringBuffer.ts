@@ -0,0 +1,61 @@
+// src/lib/ringBuffer.ts
+import { TrendSeries } from "../types";
+
+// Sabit kapasiteli (ts, value) halka tamponu.
+// Her push O(1) ve hiç allocation yapmaz; index 0 her zaman en eski nokta.
+export class TrendRingBuffer implements TrendSeries {
+  readonly capacity: number;
+
+  private readonly tsBuf: Float64Array;
+  private readonly valueBuf: Float64Array;
+  private head = 0; // bir sonraki yazılacak slot
+  private size = 0;
+  private pushes = 0;
+
+  constructor(capacity: number) {
+    this.capacity = capacity;
+    this.tsBuf = new Float64Array(capacity);
+    this.valueBuf = new Float64Array(capacity);
+  }
+
+  get length(): number {
+    return this.size;
+  }
+
+  // Her push'ta artar; bileşenler "veri değişti mi" kontrolü için kullanabilir.
+  get version(): number {
+    return this.pushes;
+  }
+
+  push(ts: number, value: number): void {
+    this.tsBuf[this.head] = ts;
+    this.valueBuf[this.head] = value;
+    this.head = (this.head + 1) % this.capacity;
+    if (this.size < this.capacity) this.size++;
+    this.pushes++;
+  }
+
+  tsAt(i: number): number {
+    return this.tsBuf[this.slot(i)];
+  }
+
+  valueAt(i: number): number {
+    return this.valueBuf[this.slot(i)];
+  }
+
+  clear(): void {
+    this.head = 0;
+    this.size = 0;
+    this.pushes++;
+  }
+
+  private slot(i: number): number {
+    return (this.head - this.size + i + this.capacity) % this.capacity;
+  }
+}
+
+// Serinin son `size` noktasının başlangıç index'i ve uzunluğu
+export const seriesWindow = (series: TrendSeries, size: number) => {
+  const count = Math.min(series.length, size);
+  return { start: series.length - count, count };
+};
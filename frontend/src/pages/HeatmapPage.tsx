@@ -5,11 +5,11 @@ import { useSwatRealtime } from "../context/SwatRealtimeContext";
 // import { useSwatRealtimeData } from "../hooks/useSwatRealtimeData";
 
 export const HeatmapPage: React.FC = () => {
-  const { heatmapData } = useSwatRealtime();
+  const { heatmap } = useSwatRealtime();
 
   return (
     <div className="h-full">
-      <Heatmap data={heatmapData} />
+      <Heatmap data={heatmap} />
     </div>
   );
 };
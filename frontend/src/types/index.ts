@@ -1,15 +1,21 @@
-export type TrendPoint = {
-  ts: number;      // epoch milliseconds
-  value: number;
-};
+export type SensorFlag = "normal" | "warning" | "critical";
+
+// Trend verisi halka tamponlarda tutulur (bkz. lib/ringBuffer.ts).
+// index 0 en eski, length - 1 en yeni nokta.
+export interface TrendSeries {
+  readonly length: number;
+  readonly version: number; // her yeni noktada artar
+  tsAt(i: number): number; // epoch milliseconds
+  valueAt(i: number): number;
+}
 
 export interface SensorData {
   id: string;
   name: string;
   value: number;
   unit: string;
-  trend: TrendPoint[];
-  status: "normal" | "warning" | "critical";
+  trend: TrendSeries;
+  status: SensorFlag;
 }
 
 export interface PlantComponent {
@@ -24,32 +30,31 @@ export interface PlantComponent {
 export interface AnomalyEvent {
   id: string;
   timestamp: Date;
+  endTimestamp?: Date; // episode kapandıysa
   severity: "low" | "medium" | "high";
   message: string;
   sensor: string;
   value?: number;
+  topSensors?: string[]; // en çok katkı veren sensörler (z'ye göre)
 }
 
-// export interface HeatmapData {
-//   sensor: string;
-//   time: string;
-//   value: number;
-//   anomaly: boolean;
-// }
+// Heatmap ızgarası (bkz. lib/heatmapGrid.ts).
+// slot 0 en eski, length - 1 en yeni zaman dilimi.
+export interface HeatmapSeries {
+  readonly version: number;
+  readonly sensors: readonly string[];
+  readonly length: number; // dolu zaman dilimi sayısı
 
-export interface HeatmapData {
-  sensor: string;
-  time: string;
+  slotLabel(slot: number): string;
 
   // 0–1 arası intensity (z-score'dan türetilmiş)
-  value: number;
+  intensityAt(sensor: number, slot: number): number;
 
-  // o anda bu sensör critical mi?
-  anomaly: boolean;
+  // kaç σ (modelden gelmediyse undefined)
+  zAt(sensor: number, slot: number): number | undefined;
 
-  // 🔽 yeni alanlar (modelden)
-  zScore?: number; // kaç σ
-  flag?: "normal" | "warning" | "critical"; // seviye
+  // seviye; "critical" ise hücre anomali olarak işaretlenir
+  flagAt(sensor: number, slot: number): SensorFlag | undefined;
 }
 
 export type NavigationItem = "overview" | "control" | "logs" | "xai";
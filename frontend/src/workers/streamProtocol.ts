@@ -0,0 +1,83 @@
+// src/workers/streamProtocol.ts
+// Ana thread <-> swatStream.worker arasındaki mesaj tipleri.
+import { SensorFlag } from "../types";
+
+// Sensör seviyelerini typed array içinde taşımak için kodlar
+export const FLAG_NONE = 0;
+export const FLAG_NORMAL = 1;
+export const FLAG_WARNING = 2;
+export const FLAG_CRITICAL = 3;
+
+export const encodeFlag = (flag: string | undefined): number =>
+  flag === "normal"
+    ? FLAG_NORMAL
+    : flag === "warning"
+    ? FLAG_WARNING
+    : flag === "critical"
+    ? FLAG_CRITICAL
+    : FLAG_NONE;
+
+export const decodeFlag = (code: number): SensorFlag | undefined =>
+  code === FLAG_NORMAL
+    ? "normal"
+    : code === FLAG_WARNING
+    ? "warning"
+    : code === FLAG_CRITICAL
+    ? "critical"
+    : undefined;
+
+// Backend'in events.py'de ürettiği atak episode'u
+// (/events cevabı ve WebSocket episode delta'ları aynı şekli kullanır)
+export type BackendEpisode = {
+  id: number;
+  // "model": anomaly score episode'u, "label": ground-truth atak segmenti
+  source: "model" | "label";
+  start_index: number;
+  end_index: number;
+  start_timestamp: string;
+  end_timestamp: string;
+  peak_score: number | null; // label segmentinde pencere dolmadıysa null
+  peak_index: number;
+  peak_timestamp: string;
+  top_sensors: { sensor: string; z: number }[];
+  frames: number;
+  open: boolean;
+};
+
+export type EpisodeDelta = {
+  type: "episode";
+  action: "start" | "end";
+  episode: BackendEpisode;
+};
+
+// Ana thread -> worker
+export type StreamWorkerCommand = {
+  type: "connect";
+  url: string;
+  // UI'da gösterilen sensör id'leri; sensorValues bu sırayla paketlenir.
+  // "anomaly_score" pseudo-sensörü prediction.anomaly_score'dan okunur.
+  sensorIds: string[];
+};
+
+// Worker'ın son flush'tan beri biriktirdiği frame'ler, sütun bazlı paketlenmiş.
+// Tüm typed array'ler postMessage ile transfer edilir (kopyalanmaz).
+export type StreamBatch = {
+  type: "batch";
+  count: number;
+  indices: Int32Array; // count
+  timestamps: Float64Array; // count, epoch ms
+  lastTimestamp: string; // son frame'in ISO timestamp'i
+  anomalyScores: Float64Array; // count, prediction yoksa NaN
+  sensorValues: Float64Array; // count * sensorIds.length, değer yoksa NaN
+  sensorFlags: Uint8Array; // count * sensorIds.length, FLAG_* kodları
+  // Heatmap için tüm feature'lar; featureNames sadece değiştiğinde gönderilir
+  featureNames: string[] | null;
+  featureIntensity: Float64Array; // count * featureCount
+  featureZ: Float64Array; // count * featureCount
+  featureFlags: Uint8Array; // count * featureCount
+};
+
+export type StreamWorkerEvent =
+  | StreamBatch
+  | EpisodeDelta
+  | { type: "status"; status: "open" | "closed" | "error" };
@@ -0,0 +1,162 @@
+// src/workers/swatStream.worker.ts
+// WebSocket bağlantısı ve JSON decode işi ana thread'den alınıp burada yapılır.
+// Gelen frame'ler biriktirilir ve en fazla FLUSH_INTERVAL_MS'de bir,
+// typed array'lere paketlenmiş tek bir StreamBatch olarak gönderilir.
+import {
+  EpisodeDelta,
+  StreamBatch,
+  StreamWorkerCommand,
+  StreamWorkerEvent,
+  encodeFlag,
+} from "./streamProtocol";
+
+type BackendPrediction = {
+  anomaly_score: number;
+  is_attack: boolean;
+
+  per_feature_error?: Record<string, number>;
+  per_feature_z?: Record<string, number>;
+  per_feature_flag?: Record<string, "normal" | "warning" | "critical">;
+  per_feature_intensity?: Record<string, number>;
+} | null;
+
+type BackendMessage = {
+  index: number;
+  timestamp: string;
+  sensors: Record<string, number>;
+  label: number | string | null;
+  prediction: BackendPrediction;
+  sent_at?: number; // sunucunun yayın anı (epoch s), UI'da kullanılmıyor
+};
+
+// ~1 animasyon karesi
+const FLUSH_INTERVAL_MS = 16;
+
+let ws: WebSocket | null = null;
+let sensorIds: string[] = [];
+let featureNames: string[] = [];
+let featureNamesDirty = false;
+let pending: BackendMessage[] = [];
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+
+const post = (msg: StreamWorkerEvent, transfer: Transferable[] = []) => {
+  self.postMessage(msg, { transfer });
+};
+
+const toNumber = (v: unknown) =>
+  typeof v === "number" && Number.isFinite(v) ? v : NaN;
+
+const flush = () => {
+  flushTimer = null;
+  const frames = pending;
+  pending = [];
+  const count = frames.length;
+  if (count === 0) return;
+
+  const nSensors = sensorIds.length;
+  const nFeatures = featureNames.length;
+
+  const batch: StreamBatch = {
+    type: "batch",
+    count,
+    indices: new Int32Array(count),
+    timestamps: new Float64Array(count),
+    lastTimestamp: frames[count - 1].timestamp,
+    anomalyScores: new Float64Array(count),
+    sensorValues: new Float64Array(count * nSensors),
+    sensorFlags: new Uint8Array(count * nSensors),
+    featureNames: featureNamesDirty ? featureNames : null,
+    featureIntensity: new Float64Array(count * nFeatures),
+    featureZ: new Float64Array(count * nFeatures),
+    featureFlags: new Uint8Array(count * nFeatures),
+  };
+  featureNamesDirty = false;
+
+  frames.forEach((data, f) => {
+    const pred = data.prediction;
+    const flags = pred?.per_feature_flag ?? {};
+    const score = toNumber(pred?.anomaly_score);
+
+    batch.indices[f] = data.index;
+    batch.timestamps[f] = new Date(data.timestamp).getTime();
+    batch.anomalyScores[f] = score;
+
+    const sBase = f * nSensors;
+    for (let k = 0; k < nSensors; k++) {
+      const id = sensorIds[k];
+      batch.sensorValues[sBase + k] =
+        id === "anomaly_score" ? score : toNumber(data.sensors[id]);
+      batch.sensorFlags[sBase + k] = encodeFlag(flags[id]);
+    }
+
+    const intensity = pred?.per_feature_intensity ?? {};
+    const z = pred?.per_feature_z ?? {};
+    const fBase = f * nFeatures;
+    for (let k = 0; k < nFeatures; k++) {
+      const name = featureNames[k];
+      batch.featureIntensity[fBase + k] = intensity[name] ?? 0;
+      batch.featureZ[fBase + k] = z[name] ?? 0;
+      batch.featureFlags[fBase + k] = encodeFlag(flags[name]);
+    }
+  });
+
+  post(batch, [
+    batch.indices.buffer,
+    batch.timestamps.buffer,
+    batch.anomalyScores.buffer,
+    batch.sensorValues.buffer,
+    batch.sensorFlags.buffer,
+    batch.featureIntensity.buffer,
+    batch.featureZ.buffer,
+    batch.featureFlags.buffer,
+  ]);
+};
+
+const onFrame = (data: BackendMessage) => {
+  // Feature listesi ilk frame'den (veya değişirse) çıkarılır
+  const keys = Object.keys(data.sensors);
+  if (
+    keys.length !== featureNames.length ||
+    keys.some((k, i) => k !== featureNames[i])
+  ) {
+    // Eski listeyle paketlenmiş frame'leri önce gönder
+    flush();
+    featureNames = keys;
+    featureNamesDirty = true;
+  }
+
+  pending.push(data);
+  if (flushTimer === null) {
+    flushTimer = setTimeout(flush, FLUSH_INTERVAL_MS);
+  }
+};
+
+const connect = (url: string) => {
+  ws = new WebSocket(url);
+  ws.onopen = () => post({ type: "status", status: "open" });
+  ws.onmessage = (event) => {
+    const data: BackendMessage | EpisodeDelta = JSON.parse(event.data);
+    // Frame mesajlarında "type" alanı yok; sadece episode delta'larında var
+    if ("type" in data) {
+      // Sıra korunsun diye önce bekleyen frame'ler gönderilir
+      flush();
+      post(data);
+    } else {
+      onFrame(data);
+    }
+  };
+  ws.onerror = () => post({ type: "status", status: "error" });
+  ws.onclose = () => {
+    flush();
+    post({ type: "status", status: "closed" });
+  };
+};
+
+self.onmessage = (event: MessageEvent<StreamWorkerCommand>) => {
+  const cmd = event.data;
+  if (cmd.type === "connect") {
+    ws?.close();
+    sensorIds = cmd.sensorIds;
+    connect(cmd.url);
+  }
+};